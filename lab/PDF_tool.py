@@ -1,7 +1,14 @@
+import asyncio
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Optional, Union
+from typing import Any, Iterator, Optional, Union
 import pymupdf
 import logging
+import os
+import stat
+import threading
 
 from llm.message_history import MessageHistory
 from lab.base import (
@@ -11,8 +18,31 @@ from lab.base import (
 from utilss.workspace_manager import WorkspaceManager
 
 
+_UPLOADS_DIR = "uploaded_files"
+
+# Same flags get_text("text") uses by default
+_TEXT_FLAGS = pymupdf.TEXTFLAGS_TEXT
+
+# Consecutive page failures of one kind after which the document is considered broken
+_MAX_CONSECUTIVE_PAGE_ERRORS = 3
+
+
+@lru_cache(maxsize=256)
+def _normalize_upload_path(relative_path: str) -> str:
+    """Point a relative path inside 'uploaded_files' unless one of its parts already is."""
+    rp = relative_path.replace("\\", "/")
+    if f"/{_UPLOADS_DIR}/" in f"/{rp}/":
+        return rp
+    return f"{_UPLOADS_DIR}/{rp.rstrip('/').rsplit('/', 1)[-1]}"
+
+
 class PDFTextReader(AgentPlugin):
-    """Enhanced PDF text extraction tool with page-based access and better error handling."""
+    """Enhanced PDF text extraction tool with page-based access and better error handling.
+
+    Files larger than ``large_file_threshold`` bytes are opened for a single call and
+    MuPDF's store is shrunk afterwards, trading re-parsing on the next call for a
+    bounded memory footprint.
+    """
     
     name = "pdf_content_extract"
     description = (
@@ -40,6 +70,11 @@ class PDFTextReader(AgentPlugin):
                 "type": "boolean",
                 "description": "Whether to include PDF metadata in the output. Defaults to False.",
                 "default": False
+            },
+            "include_page_info": {
+                "type": "boolean",
+                "description": "Whether to include per-page character counts in the output. Defaults to False.",
+                "default": False
             }
         },
         "required": ["file_path"]
@@ -49,43 +84,120 @@ class PDFTextReader(AgentPlugin):
         self,
         workspace_manager: WorkspaceManager,
         max_output_length: int = 15000,
+        doc_cache_size: int = 8,
+        blank_page_threshold: int = 64,
+        large_file_threshold: int = 50 * 1024 * 1024,
         logger: Optional[logging.Logger] = None
     ):
         super().__init__()
         self.workspace_manager = workspace_manager
         self.max_output_length = max_output_length
+        self.doc_cache_size = doc_cache_size
+        self.blank_page_threshold = blank_page_threshold
+        self.large_file_threshold = large_file_threshold
         self.logger = logger or logging.getLogger(__name__)
 
-    def _validate_file_path(self, relative_path: str) -> tuple[bool, str, Optional[Path]]:
-        """Validate the file path and return validation result."""
+        # Open documents shared across calls: path -> (mtime_ns, document, document lock)
+        self._doc_lru: OrderedDict[str, tuple[int, pymupdf.Document, threading.Lock]] = OrderedDict()
+        self._doc_lock = threading.Lock()
+
+    def _get_doc(self, full_path: Path, mtime_ns: int) -> tuple[pymupdf.Document, threading.Lock]:
+        """Return an open document for the path, reusing a cached handle when the file is unchanged."""
+        key = str(full_path)
+        dropped = []
+
+        try:
+            with self._doc_lock:
+                cached = self._doc_lru.get(key)
+                if cached is not None and cached[0] == mtime_ns:
+                    self._doc_lru.move_to_end(key)
+                    return cached[1], cached[2]
+                if cached is not None:
+                    # File changed on disk, drop the stale handle
+                    dropped.append(self._doc_lru.pop(key))
+
+                doc = pymupdf.open(full_path)
+                lock = threading.Lock()
+                self._doc_lru[key] = (mtime_ns, doc, lock)
+                # Always keep the handle being returned
+                while len(self._doc_lru) > max(self.doc_cache_size, 1):
+                    dropped.append(self._doc_lru.popitem(last=False)[1])
+                return doc, lock
+        finally:
+            # Closing waits for in-flight extractions, so do it without blocking other lookups
+            for entry in dropped:
+                self._close_cached(entry)
+
+    @staticmethod
+    def _close_cached(entry: tuple[int, pymupdf.Document, threading.Lock]) -> None:
+        """Close a cached document once no caller is using it."""
+        _, doc, lock = entry
+        with lock:
+            doc.close()
+
+    @contextmanager
+    def _open_doc(self, full_path: Path, file_stat: os.stat_result) -> Iterator[pymupdf.Document]:
+        """Yield a cached document, holding its lock since MuPDF documents are not thread-safe."""
+        if file_stat.st_size > self.large_file_threshold:
+            # Large files are not kept open; release MuPDF's cached objects right after use
+            doc = pymupdf.open(full_path)
+            try:
+                yield doc
+            finally:
+                doc.close()
+                pymupdf.TOOLS.store_shrink(100)
+            return
+
+        while True:
+            doc, lock = self._get_doc(full_path, file_stat.st_mtime_ns)
+            with lock:
+                # Another call may have evicted and closed it before we got the lock
+                if not doc.is_closed:
+                    yield doc
+                    return
+
+    def close(self) -> None:
+        """Close all cached documents."""
+        with self._doc_lock:
+            entries = list(self._doc_lru.values())
+            self._doc_lru.clear()
+        for entry in entries:
+            self._close_cached(entry)
+
+    def _validate_file_path(
+        self, relative_path: str
+    ) -> tuple[bool, str, Optional[Path], Optional[os.stat_result]]:
+        """Validate the file path and return validation result along with the file's stat."""
         try:
             # Ensure the path points inside 'uploaded_files' if not already
-            if "uploaded_files" not in Path(relative_path).parts:
-                relative_path = str(Path("uploaded_files") / Path(relative_path).name)
+            relative_path = _normalize_upload_path(relative_path)
     
-            full_path = self.workspace_manager.workspace_path(Path(relative_path))
+            full_path = self.workspace_manager.workspace_path(relative_path)
     
-            if not full_path.exists():
-                return False, f"File not found at {relative_path}", None
+            try:
+                st = os.stat(full_path)
+            except FileNotFoundError:
+                return False, f"File not found at {relative_path}", None, None
     
-            if not full_path.is_file():
-                return False, f"Path {relative_path} is not a file", None
+            if not stat.S_ISREG(st.st_mode):
+                return False, f"Path {relative_path} is not a file", None, None
     
-            if full_path.suffix.lower() != ".pdf":
-                return False, f"File {relative_path} is not a PDF", None
+            if not relative_path.lower().endswith(".pdf"):
+                return False, f"File {relative_path} is not a PDF", None, None
     
-            return True, "", full_path
+            return True, "", full_path, st
     
         except Exception as e:
-            return False, f"Invalid file path: {str(e)}", None
+            return False, f"Invalid file path: {str(e)}", None, None
 
 
     def _validate_page_range(self, start_page: Optional[int], end_page: Optional[int], 
                            total_pages: int) -> tuple[bool, str, int, int]:
         """Validate and normalize page range."""
         # Set defaults
-        start = start_page if start_page is not None else 1
-        end = end_page if end_page is not None else total_pages
+        # The schema accepts integral floats such as 1.0
+        start = int(start_page) if start_page is not None else 1
+        end = int(end_page) if end_page is not None else total_pages
         
         # Validate range
         if start < 1:
@@ -124,29 +236,74 @@ class PDFTextReader(AgentPlugin):
             self.logger.warning(f"Failed to extract metadata: {str(e)}")
             return {"total_pages": doc.page_count}
 
-    def _extract_text_from_pages(self, doc: pymupdf.Document, start_page: int, 
-                                end_page: int) -> tuple[str, dict[str, Any]]:
-        """Extract text from specified page range."""
-        extracted_text = ""
-        page_info = {}
+    def _is_blank_page(self, doc: pymupdf.Document, page: pymupdf.Page) -> bool:
+        """Detect pages whose content stream is too small to hold text, so font loading can be skipped."""
+        if self.blank_page_threshold <= 0:
+            return False
+
+        size = 0
+        for xref in page.get_contents():
+            stream = doc.xref_stream(xref) or b""
+            size += len(stream)
+            # Any text object means there is something worth decoding
+            if size >= self.blank_page_threshold or b"BT" in stream:
+                return False
+
+        # Form XObjects can hide the real content behind a tiny "Do" stream
+        return not page.get_xobjects()
+
+    def _extract_one_page(self, page: pymupdf.Page) -> str:
+        """Extract plain text from a page, releasing its TextPage as soon as we are done."""
+        textpage = page.get_textpage(flags=_TEXT_FLAGS)
+        try:
+            return textpage.extractText()
+        finally:
+            del textpage
+
+    def _extract_text_from_pages(self, doc: pymupdf.Document, start_page: int, end_page: int,
+                                include_page_info: bool = False
+                                ) -> tuple[str, Optional[list[Union[int, dict[str, str]]]]]:
+        """Extract text from specified page range.
+
+        When ``include_page_info`` is set, ``page_info`` holds one entry per page in the
+        range: the extracted character count, or ``{"error": ...}`` if the page failed.
+        Otherwise it is ``None``. Repeated failures of the same kind are treated as a
+        document-level error and re-raised.
+        """
+        parts: list[str] = []
+        headers = [f"\n--- Page {n} ---\n" for n in range(start_page, end_page + 1)]
+        page_info: Optional[list[Union[int, dict[str, str]]]] = (
+            [0] * len(headers) if include_page_info else None
+        )
+        last_error_type: Optional[type] = None
+        consecutive_errors = 0
         
-        for page_num in range(start_page - 1, end_page):  # Convert to 0-based indexing
+        for idx, page_num in enumerate(range(start_page - 1, end_page)):  # Convert to 0-based indexing
             try:
                 page = doc.load_page(page_num)
-                page_text = page.get_text("text")
+                if self._is_blank_page(doc, page):
+                    continue
+                page_text = self._extract_one_page(page)
                 
-                if page_text.strip():  # Only add non-empty pages
-                    extracted_text += f"\n--- Page {page_num + 1} ---\n"
-                    extracted_text += page_text
-                    page_info[f"page_{page_num + 1}"] = len(page_text)
-                else:
-                    page_info[f"page_{page_num + 1}"] = 0
+                if page_text and not page_text.isspace():  # Only add non-empty pages
+                    parts.append(headers[idx])
+                    parts.append(page_text)
+                    if page_info is not None:
+                        page_info[idx] = len(page_text)
+                consecutive_errors = 0
                     
-            except Exception as e:
+            except (pymupdf.FileDataError, RuntimeError) as e:
+                if type(e) is last_error_type:
+                    consecutive_errors += 1
+                else:
+                    last_error_type, consecutive_errors = type(e), 1
+                if consecutive_errors >= _MAX_CONSECUTIVE_PAGE_ERRORS:
+                    raise
                 self.logger.error(f"Failed to extract text from page {page_num + 1}: {str(e)}")
-                page_info[f"page_{page_num + 1}_error"] = str(e)
+                if page_info is not None:
+                    page_info[idx] = {"error": str(e)}
                 
-        return extracted_text.strip(), page_info
+        return "".join(parts).strip(), page_info
 
     async def run_impl(self,
                       tool_input: dict[str, Any],
@@ -158,9 +315,10 @@ class PDFTextReader(AgentPlugin):
         start_page = tool_input.get("start_page")
         end_page = tool_input.get("end_page")
         include_metadata = tool_input.get("include_metadata", False)
+        include_page_info = tool_input.get("include_page_info", False)
         
         # Validate file path
-        is_valid, error_msg, full_file_path = self._validate_file_path(relative_file_path)
+        is_valid, error_msg, full_file_path, file_stat = self._validate_file_path(relative_file_path)
         if not is_valid:
             return AgentImplOutput(
                 f"Error: {error_msg}",
@@ -168,78 +326,103 @@ class PDFTextReader(AgentPlugin):
                 {"success": False, "error": error_msg},
             )
 
+        return await asyncio.to_thread(
+            self._extract_sync,
+            full_file_path,
+            file_stat,
+            relative_file_path,
+            start_page,
+            end_page,
+            include_metadata,
+            include_page_info,
+        )
+
+    def _extract_sync(self,
+                      full_file_path: Path,
+                      file_stat: os.stat_result,
+                      relative_file_path: str,
+                      start_page: Optional[int],
+                      end_page: Optional[int],
+                      include_metadata: bool,
+                      include_page_info: bool) -> AgentImplOutput:
+        """Open the document, extract the requested pages and build the tool output.
+
+        Runs in a worker thread so the blocking MuPDF calls stay off the event loop.
+        """
         try:
-            # Open PDF document
-            doc = pymupdf.open(full_file_path)
-            total_pages = doc.page_count
+            with self._open_doc(full_file_path, file_stat) as doc:
+                total_pages = doc.page_count
             
-            # Validate page range
-            is_valid_range, range_error, start, end = self._validate_page_range(
-                start_page, end_page, total_pages
-            )
-            if not is_valid_range:
-                doc.close()
-                return AgentImplOutput(
-                    f"Error: {range_error}",
-                    f"Page range validation failed: {range_error}",
-                    {"success": False, "error": range_error},
+                # Validate page range
+                is_valid_range, range_error, start, end = self._validate_page_range(
+                    start_page, end_page, total_pages
                 )
+                if not is_valid_range:
+                    return AgentImplOutput(
+                        f"Error: {range_error}",
+                        f"Page range validation failed: {range_error}",
+                        {"success": False, "error": range_error},
+                    )
             
-            # Extract text from specified pages
-            extracted_text, page_info = self._extract_text_from_pages(doc, start, end)
+                # Extract text from specified pages
+                extracted_text, page_lengths = self._extract_text_from_pages(
+                    doc, start, end, include_page_info
+                )
             
-            # Extract metadata if requested
-            metadata = self._extract_metadata(doc) if include_metadata else {}
+                # Extract metadata if requested
+                metadata = self._extract_metadata(doc) if include_metadata else {}
             
-            doc.close()
-            
-            # Handle empty extraction
-            if not extracted_text:
-                return AgentImplOutput(
-                    f"Warning: No text content found in pages {start} to {end} of {relative_file_path}",
-                    f"No text extracted from specified pages",
-                    {
+                # Handle empty extraction
+                if not extracted_text:
+                    empty_data = {
                         "success": True,
                         "extracted_chars": 0,
                         "pages_processed": end - start + 1,
-                        "page_info": page_info,
                         "metadata": metadata
-                    },
-                )
+                    }
+                    if include_page_info:
+                        empty_data["page_info"] = {"page_range_start": start, "page_lengths": page_lengths}
+                    return AgentImplOutput(
+                        f"Warning: No text content found in pages {start} to {end} of {relative_file_path}",
+                        f"No text extracted from specified pages",
+                        empty_data,
+                    )
             
-            # Truncate if necessary
-            original_length = len(extracted_text)
-            if len(extracted_text) > self.max_output_length:
-                extracted_text = (
-                    extracted_text[:self.max_output_length]
-                    + f"\n\n... (content truncated due to length limit of {self.max_output_length} characters)"
-                )
+                # Truncate if necessary
+                original_length = len(extracted_text)
+                if len(extracted_text) > self.max_output_length:
+                    extracted_text = (
+                        extracted_text[:self.max_output_length]
+                        + f"\n\n... (content truncated due to length limit of {self.max_output_length} characters)"
+                    )
             
-            # Prepare success response
-            response_data = {
-                "success": True,
-                "extracted_chars": original_length,
-                "displayed_chars": len(extracted_text),
-                "pages_processed": end - start + 1,
-                "page_range": f"{start}-{end}",
-                "total_pages": total_pages,
-                "page_info": page_info,
-                "truncated": original_length > self.max_output_length
-            }
+                # Prepare success response
+                response_data = {
+                    "success": True,
+                    "extracted_chars": original_length,
+                    "displayed_chars": len(extracted_text),
+                    "pages_processed": end - start + 1,
+                    "page_range": f"{start}-{end}",
+                    "total_pages": total_pages,
+                    "truncated": original_length > self.max_output_length
+                }
             
-            if include_metadata:
-                response_data["metadata"] = metadata
+                if include_page_info:
+                    response_data["page_info"] = {"page_range_start": start, "page_lengths": page_lengths}
             
-            success_message = (
-                f"Successfully extracted text from {relative_file_path} "
-                f"(pages {start}-{end}, {original_length} characters)"
-            )
+                if include_metadata:
+                    response_data["metadata"] = metadata
             
-            return AgentImplOutput(
-                extracted_text,
-                success_message,
-                response_data,
-            )
+                success_message = (
+                    f"Successfully extracted text from {relative_file_path} "
+                    f"(pages {start}-{end}, {original_length} characters)"
+                )
+            
+                return AgentImplOutput(
+                    extracted_text,
+                    success_message,
+                    response_data,
+                )
             
         except pymupdf.FileDataError as e:
             error_msg = f"PDF file is corrupted or invalid: {str(e)}"
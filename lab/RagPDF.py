@@ -1,34 +1,425 @@
 
 from pathlib import Path
-from typing import Any, Optional, List, Dict, Set
+from typing import Any, Optional, Iterator, List, Dict, Literal, Set
 import logging
 import hashlib
+import json
+import math
+import mmap
 from datetime import datetime
 import asyncio
+import os
+import stat
+import threading
+import time
 import uuid
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing, contextmanager, nullcontext
+from dataclasses import asdict, dataclass
 
+from pymongo.errors import PyMongoError
 from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.exceptions import UnexpectedResponse
 from qdrant_client.models import (
     Distance, VectorParams, PointStruct, 
-    Filter, FieldCondition, MatchValue, PayloadSchemaType
+    Filter, FieldCondition, MatchValue, PayloadSchemaType,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    SearchParams, QuantizationSearchParams
 )
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+import numpy as np
 import pymupdf
 
+try:
+    import pypdfium2 as pdfium
+    HAS_PYPDFIUM2 = True
+except ImportError:
+    HAS_PYPDFIUM2 = False
+
+# PDFium may only be used from one thread at a time
+_PDFIUM_LOCK = threading.Lock()
+
 from lab.base import AgentPlugin, AgentImplOutput
 from llm.message_history import MessageHistory
 from utilss.workspace_manager import WorkspaceManager
 from Mongodb.db import DatabaseManager
 
+logger = logging.getLogger(__name__)
+
+
+# HTTP clients shared by every user's tools. Kept per event loop, since their
+# connection pools are bound to the loop they were created on
+_shared_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, Any]]" = weakref.WeakKeyDictionary()
+
+
+def _shared_client(key: tuple, factory):
+    """Return the client for key on the running event loop, creating it with factory on first use"""
+    clients = _shared_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(key)
+    if client is None:
+        client = clients[key] = factory()
+    return client
+
+
+def calculate_file_hash(file_path: Path) -> str:
+    """Calculate the SHA256 hash of a file in a single C-level pass"""
+    with open(file_path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _fast_hash(file_path: Path) -> str:
+    """
+    128-bit BLAKE2b of a file, hashed straight from a read-only memory map so the
+    content is never copied into a Python bytes object
+    """
+    h = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return h.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, "madvise"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            h.update(mm)
+    return h.hexdigest()
+
+
+# (path, size, mtime_ns) -> SHA256, shared by all tools in the process
+_HASH_CACHE_SIZE = 1024
+_hash_cache: "OrderedDict[tuple[str, int, int], str]" = OrderedDict()
+_hash_cache_lock = threading.Lock()
+
+
+def _hash_cache_key(file_path: Path) -> tuple[str, int, int]:
+    st = file_path.stat()
+    return (str(file_path), st.st_size, st.st_mtime_ns)
+
+
+def _hash_cache_get(key: tuple[str, int, int]) -> Optional[str]:
+    with _hash_cache_lock:
+        file_hash = _hash_cache.get(key)
+        if file_hash is not None:
+            _hash_cache.move_to_end(key)
+        return file_hash
+
+
+def _hash_cache_put(key: tuple[str, int, int], file_hash: str):
+    with _hash_cache_lock:
+        _hash_cache[key] = file_hash
+        while len(_hash_cache) > _HASH_CACHE_SIZE:
+            _hash_cache.popitem(last=False)
+
+
+def cached_file_hash(file_path: Path) -> str:
+    """Return the file's SHA256 hash, reusing it while path, size and mtime are unchanged"""
+    key = _hash_cache_key(file_path)
+    file_hash = _hash_cache_get(key)
+    if file_hash is None:
+        file_hash = calculate_file_hash(file_path)
+        _hash_cache_put(key, file_hash)
+    return file_hash
+
+
+def cached_fast_hash(file_path: Path) -> str:
+    """Return the file's _fast_hash, reusing it while path, size and mtime are unchanged"""
+    path, size, mtime_ns = _hash_cache_key(file_path)
+    # Prefixed so it shares the LRU with the SHA256 entries without colliding with them
+    key = (f"blake2b:{path}", size, mtime_ns)
+    file_hash = _hash_cache_get(key)
+    if file_hash is None:
+        file_hash = _fast_hash(file_path)
+        _hash_cache_put(key, file_hash)
+    return file_hash
+
+
+def peek_file_hash(file_path: Path) -> Optional[str]:
+    """Return the cached hash if path, size and mtime are unchanged, without reading the file"""
+    return _hash_cache_get(_hash_cache_key(file_path))
+
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter over strings, with k bit positions from double hashing"""
+    
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+    
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+    
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that grows by chaining filters of doubling capacity, each with half
+    the previous error rate, so the overall false-positive rate stays under error_rate
+    """
+    
+    def __init__(self, initial_capacity: int = 10000, error_rate: float = 1e-4):
+        self.filters = [BloomFilter(initial_capacity, error_rate / 2)]
+    
+    def __contains__(self, key: str) -> bool:
+        return any(key in f for f in self.filters)
+    
+    def __len__(self) -> int:
+        return sum(f.count for f in self.filters)
+    
+    def add(self, key: str) -> bool:
+        """Add a key, returning False if it (probably) was already present"""
+        if key in self:
+            return False
+        last = self.filters[-1]
+        if last.count >= last.capacity:
+            # Error rates error_rate/2, /4, /8, ... sum to at most error_rate
+            last = BloomFilter(last.capacity * 2, last.error_rate / 2)
+            self.filters.append(last)
+        last.add(key)
+        return True
+
+
+# Chunk boundaries, strongest first
+_CHUNK_SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+
+def split_text_fast(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+    """
+    Split text into chunks of at most chunk_size characters, overlapping by about
+    chunk_overlap characters. Each chunk ends at the strongest separator found in
+    its second half, located with C-level str.rfind instead of a per-piece merge.
+    """
+    chunks = []
+    start = 0
+    length = len(text)
+    while start < length:
+        end = min(start + chunk_size, length)
+        if end < length:
+            lo = start + chunk_size // 2
+            for sep in _CHUNK_SEPARATORS:
+                pos = text.rfind(sep, lo, end)
+                if pos != -1:
+                    end = pos + len(sep)
+                    break
+        
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= length:
+            break
+        
+        # Step back for the overlap, then forward to the next word start
+        next_start = max(end - chunk_overlap, start + 1)
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space != -1 else next_start
+    return chunks
+
+
+_UPLOADS_PREFIX = "uploaded_files/"
+
+
+@lru_cache(maxsize=256)
+def _normalize_upload_path(relative_path: str) -> str:
+    """
+    Point a relative path inside 'uploaded_files' unless one of its parts already is,
+    using plain string checks instead of building Path objects on every tool call
+    """
+    rp = relative_path.replace("\\", "/")
+    if f"/{_UPLOADS_PREFIX}" in f"/{rp}/":
+        return rp
+    return _UPLOADS_PREFIX + rp.rstrip("/").rsplit("/", 1)[-1]
+
+
+# Namespace for deterministic Qdrant point IDs
+_POINT_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_OID, "rag_documents")
+
+
+# PDF text extraction is CPU-bound, so run it in separate processes rather than threads
+_PDF_POOL: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """Return the shared extraction process pool, creating it on first use"""
+    global _PDF_POOL
+    if _PDF_POOL is None:
+        _PDF_POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _PDF_POOL
+
+
+def _extract_pdf_pages(doc) -> tuple[List[str], Dict]:
+    """Non-empty page texts and basic metadata of an open pymupdf document"""
+    metadata = {
+        "total_pages": doc.page_count,
+        "title": doc.metadata.get("title", ""),
+        "author": doc.metadata.get("author", "")
+    }
+    
+    pages = []
+    for page_num in range(doc.page_count):
+        page = doc.load_page(page_num)
+        page_text = page.get_text("text")
+        if page_text.strip():
+            pages.append(f"--- Page {page_num + 1} ---\n{page_text.strip()}")
+    return pages, metadata
+
+
+def _extract_pdf_text_worker(pdf_path: str) -> tuple[List[str], Dict]:
+    """Extract per-page text and basic metadata from a PDF (top-level so it can run in a worker process)"""
+    doc = pymupdf.open(pdf_path)
+    try:
+        return _extract_pdf_pages(doc)
+    finally:
+        doc.close()
+        _trim_mupdf_store()
+
+
+def _hash_and_extract_worker(
+    pdf_path: str,
+    skip_hashes: Optional[ScalableBloomFilter] = None
+) -> tuple[str, Optional[tuple[List[str], Dict]]]:
+    """
+    SHA256 a PDF and extract its text from one read-only memory map, so the file is read once.
+    Extraction is skipped (None) when skip_hashes may hold the hash, or when the PDF cannot be
+    opened, in which case the caller's path-based extraction reports the error.
+    """
+    with open(pdf_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.sha256().hexdigest(), None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            file_hash = hashlib.sha256(mm).hexdigest()
+            if skip_hashes is not None and file_hash in skip_hashes:
+                return file_hash, None
+            
+            # pymupdf reads a memoryview in place; it must be released before the map closes
+            view = memoryview(mm)
+            try:
+                doc = pymupdf.open(stream=view, filetype="pdf")
+                try:
+                    return file_hash, _extract_pdf_pages(doc)
+                finally:
+                    doc.close()
+                    _trim_mupdf_store()
+            except Exception:
+                return file_hash, None
+            finally:
+                view.release()
+
+
+# MuPDF's default text flags minus ligature preservation: "ﬁ" comes out as "fi", which is
+# what search wants anyway. Media-box clipping and CID fallback stay on, so no off-page text
+_SCOUT_TEXT_FLAGS = pymupdf.TEXTFLAGS_TEXT & ~pymupdf.TEXT_PRESERVE_LIGATURES
+
+
+def _read_page_text(doc, backend: str, page_num: int) -> str:
+    """Extract the plain text of one 0-based page from a pypdfium2 or pymupdf document"""
+    if backend == "pdfium":
+        with closing(doc[page_num]) as page, closing(page.get_textpage()) as textpage:
+            return textpage.get_text_range().replace("\r\n", "\n")
+    # Document.pages() is only a load_page() loop, so direct indexing costs the same.
+    # sort=False (the default) keeps MuPDF's reading-order pass off; pages are emitted in order anyway
+    # The Page is a temporary, so its C-side structures are released as soon as this returns
+    return doc.load_page(page_num).get_text("text", flags=_SCOUT_TEXT_FLAGS, sort=False)
+
+
+# MuPDF's object store has no size setter in PyMuPDF, so it is trimmed past this size instead
+_MUPDF_STORE_LIMIT = 64 << 20
+
+# Pages between store checks during long extractions
+_STORE_CHECK_INTERVAL = 32
+
+
+def _trim_mupdf_store(limit: int = _MUPDF_STORE_LIMIT):
+    """Empty MuPDF's object store once it has grown past limit bytes (always, if its size is unknown)"""
+    size = pymupdf.TOOLS.store_size
+    if callable(size):  # a method rather than a property in some PyMuPDF releases
+        size = size()
+    if size is None or size > limit:
+        pymupdf.TOOLS.store_shrink(100)
+
+
+def _extract_page_range_worker(pdf_path: str, backend: str, lo: int, hi: int) -> List[tuple[int, str, Optional[str]]]:
+    """
+    Extract pages lo..hi-1 in a worker process, opening the PDF once.
+    Returns (page_num, text, error) per page so one bad page does not lose the slice.
+    """
+    doc = pdfium.PdfDocument(pdf_path) if backend == "pdfium" else pymupdf.open(pdf_path)
+    try:
+        out = []
+        for page_num in range(lo, hi):
+            try:
+                out.append((page_num, _read_page_text(doc, backend, page_num), None))
+            except Exception as e:
+                out.append((page_num, "", str(e)))
+            if backend == "pymupdf" and (page_num - lo + 1) % _STORE_CHECK_INTERVAL == 0:
+                _trim_mupdf_store()
+        return out
+    finally:
+        doc.close()
+        if backend == "pymupdf":
+            _trim_mupdf_store()
+
+
+@dataclass(slots=True, frozen=True)
+class PdfMetadata:
+    """Document information reported by the PDF scout tool"""
+    title: str = ""
+    author: str = ""
+    subject: str = ""
+    creator: str = ""
+    producer: str = ""
+    creation_date: str = ""
+    modification_date: str = ""
+    total_pages: int = 0
+
+
+# PdfMetadata field -> key in pymupdf's doc.metadata / pypdfium2's get_metadata_dict()
+_PYMUPDF_METADATA_KEYS = (
+    ("title", "title"), ("author", "author"), ("subject", "subject"),
+    ("creator", "creator"), ("producer", "producer"),
+    ("creation_date", "creationDate"), ("modification_date", "modDate"),
+)
+_PDFIUM_METADATA_KEYS = (
+    ("title", "Title"), ("author", "Author"), ("subject", "Subject"),
+    ("creator", "Creator"), ("producer", "Producer"),
+    ("creation_date", "CreationDate"), ("modification_date", "ModDate"),
+)
+
+
+# (model, text) -> float32 embedding row, shared by every EmbeddingProvider in the process so
+# memory stays bounded however many users are active (4096 rows of 4096 dims is ~64 MB)
+_EMBED_CACHE_SIZE = 4096
+_embed_cache: "OrderedDict[tuple[str, str], np.ndarray]" = OrderedDict()
+_embed_cache_lock = threading.Lock()
+
 
 class EmbeddingProvider:
     """Handles all embedding operations"""
     
+    # Per-request limits used by plan_batches
+    MAX_BATCH_SIZE = 2048
+    MAX_BATCH_TOKENS = 100_000
+    
     def __init__(self, provider: str = "openai", api_key: str = None):
         self.provider = provider
         self.api_key = api_key
         self._client = None
         self._dimension = 4096
+        self.model = "qwen/qwen3-embedding-8b"
            
         self.total_prompt_tokens = 0 
         self.total_embedding_tokens = 0  
@@ -40,9 +431,13 @@ class EmbeddingProvider:
         """Initialize the embedding client"""
         if self.provider == "openai":
             from openai import AsyncOpenAI
-            self._client = AsyncOpenAI(
-                base_url="https://openrouter.ai/api/v1",
-                api_key=self.api_key
+            # Token stats stay per provider instance; only the HTTP client is shared
+            self._client = _shared_client(
+                ("openai", self.api_key),
+                lambda: AsyncOpenAI(
+                    base_url="https://openrouter.ai/api/v1",
+                    api_key=self.api_key
+                )
             )
             self._dimension = 4096  
         else:
@@ -52,71 +447,114 @@ class EmbeddingProvider:
     def dimension(self) -> int:
         return self._dimension
     
-    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
-        """Batch embed multiple texts"""
+    def _cache_get(self, text: str) -> Optional[np.ndarray]:
+        """Return a cached embedding for the text, if any"""
+        key = (self.model, text)
+        with _embed_cache_lock:
+            cached = _embed_cache.get(key)
+            if cached is not None:
+                _embed_cache.move_to_end(key)
+            return cached
+    
+    def _cache_put(self, text: str, embedding: np.ndarray):
+        """Cache an embedding, evicting the least recently used ones"""
+        with _embed_cache_lock:
+            _embed_cache[(self.model, text)] = embedding
+            while len(_embed_cache) > _EMBED_CACHE_SIZE:
+                _embed_cache.popitem(last=False)
+    
+    async def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Batch embed multiple texts, only sending the ones not already cached.
+        Returns a (len(texts), dimension) float32 array.
+        """
+        cached = [self._cache_get(text) for text in texts]
+        missing = [i for i, embedding in enumerate(cached) if embedding is None]
+        
+        if not missing:
+            return np.stack(cached) if cached else np.empty((0, self.dimension), dtype=np.float32)
+        
+        fresh = await self._request_embeddings([texts[i] for i in missing])
+        if len(missing) == len(texts):
+            result = fresh
+        else:
+            result = np.empty((len(texts), fresh.shape[1]), dtype=np.float32)
+            for i, embedding in enumerate(cached):
+                if embedding is not None:
+                    result[i] = embedding
+            result[missing] = fresh
+        
+        for i, row in zip(missing, fresh):
+            self._cache_put(texts[i], row.copy())
+        return result
+    
+    async def _request_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Call the embedding API for a batch of texts"""
         if self.provider == "openai":
             response = await self._client.embeddings.create(
-                model="qwen/qwen3-embedding-8b",
+                model=self.model,
                 input=texts
             )
-            if hasattr(response, 'usage') and response.usage:
-                prompt_tokens = response.usage.prompt_tokens
-                total_tokens = response.usage.total_tokens
-                
-                # Extract cost from model_extra if available
-                cost = 0.0
-                if hasattr(response.usage, 'model_extra') and response.usage.model_extra:
-                    cost = response.usage.model_extra.get('cost', 0.0)
-                
-                # Update cumulative counters
-                self.total_prompt_tokens += prompt_tokens
-                self.total_embedding_tokens += total_tokens
-                self.total_cost += cost
-                
-                print(
-                    f"🔢 Embedded {len(texts)} texts: "
-                    f"{prompt_tokens} tokens, ${cost:.8f}"
-                )
-            else:
-                print("⚠️ No usage info in API response")
-            
-            # Update call tracking
-            self.total_texts_embedded += len(texts)
-            self.embedding_calls += 1
+            self._record_usage(response, len(texts))
 
-            return [item.embedding for item in response.data]
+            return np.asarray([item.embedding for item in response.data], dtype=np.float32)
+    
+    def _record_usage(self, response, n_texts: int):
+        """Add an embedding response's token usage and cost to the running totals"""
+        usage = getattr(response, "usage", None)
+        if usage:
+            # Cost is reported by OpenRouter in model_extra
+            cost = (getattr(usage, "model_extra", None) or {}).get("cost", 0.0)
+            
+            self.total_prompt_tokens += usage.prompt_tokens
+            self.total_embedding_tokens += usage.total_tokens
+            self.total_cost += cost
+            
+            logger.debug(
+                "Embedded %d text(s): %d tokens, $%.8f",
+                n_texts, usage.prompt_tokens, cost
+            )
+        else:
+            logger.debug("No usage info in embedding response")
+        
+        self.total_texts_embedded += n_texts
+        self.embedding_calls += 1
+    
+    def plan_batches(self, texts: List[str]) -> List[tuple[int, int]]:
+        """Split texts into request-sized (start, end) spans for embed_texts"""
+        spans = []
+        start = 0
+        batch_tokens = 0
+        for i, text in enumerate(texts):
+            tokens = len(text) // 4 + 1  # rough estimate, ~4 chars per token
+            if i > start and (
+                i - start >= self.MAX_BATCH_SIZE
+                or batch_tokens + tokens > self.MAX_BATCH_TOKENS
+            ):
+                spans.append((start, i))
+                start = i
+                batch_tokens = 0
+            batch_tokens += tokens
+        if start < len(texts):
+            spans.append((start, len(texts)))
+        return spans
     
     async def embed_query(self, query: str) -> List[float]:
-        """Embed a single query"""
+        """Embed a single query, reusing the embedding of a repeated query"""
+        cached = self._cache_get(query)
+        if cached is not None:
+            return cached.tolist()
+        
         if self.provider == "openai":
             response = await self._client.embeddings.create(
-                model="qwen/qwen3-embedding-8b",
+                model=self.model,
                 input=[query]
             )
-            if hasattr(response, 'usage') and response.usage:
-                prompt_tokens = response.usage.prompt_tokens
-                total_tokens = response.usage.total_tokens
-                
-                # Extract cost from model_extra if available
-                cost = 0.0
-                if hasattr(response.usage, 'model_extra') and response.usage.model_extra:
-                    cost = response.usage.model_extra.get('cost', 0.0)
-                
-                # Update cumulative counters
-                self.total_prompt_tokens += prompt_tokens
-                self.total_embedding_tokens += total_tokens
-                self.total_cost += cost
-                
-                print(
-                    f"🔍 Embedded query: {prompt_tokens} tokens, ${cost:.8f}"
-                )
-            else:
-                print("⚠️ No usage info in API response")
-            
-            self.total_texts_embedded += 1
-            self.embedding_calls += 1
+            self._record_usage(response, 1)
 
-            return response.data[0].embedding
+            embedding = response.data[0].embedding
+            self._cache_put(query, np.asarray(embedding, dtype=np.float32))
+            return embedding
 
     def get_token_stats(self) -> dict:
         """Get embedding token statistics"""
@@ -145,6 +583,18 @@ class DocumentIndexManager:
     Each user has their own namespace, each session is tracked separately
     """
     
+    # Payload fields every search filters on
+    PAYLOAD_INDEX_FIELDS = ("user_id", "session_id", "file_hash")
+    
+    # Collections whose payload indexes were already ensured by this process
+    _indexed_collections: Set[str] = set()
+    
+    # Whether the rag_metadata indexes were already ensured by this process
+    _metadata_indexes_ready: bool = False
+    
+    # Hashes confirmed as indexed that is_indexed answers without asking Mongo
+    RECENT_CACHE_SIZE = 4096
+    
     def __init__(
         self,
         db_manager: DatabaseManager,
@@ -164,45 +614,127 @@ class DocumentIndexManager:
         self.user_id = user_id  # USER ISOLATION
         self.session_id = session_id  # SESSION ISOLATION
         
-        # Per-user cache of indexed file hashes
-        self._indexed_cache: Set[str] = set()
+        # Per-user cache of indexed file hashes: a Bloom filter rules out unindexed
+        # files, recently confirmed hashes skip the Mongo check on a Bloom hit
+        self._indexed_bloom = ScalableBloomFilter(initial_capacity=10000, error_rate=1e-4)
+        self._recent_indexed: "OrderedDict[str, None]" = OrderedDict()
         self._lock = asyncio.Lock()
         
+    async def _ensure_payload_indexes(self):
+        """Create keyword payload indexes for the filter fields (once per collection per process)"""
+        if self.collection_name in DocumentIndexManager._indexed_collections:
+            return
+        
+        async def _create(field_name: str):
+            try:
+                await self.qdrant.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field_name,
+                    field_schema=PayloadSchemaType.KEYWORD
+                )
+            except UnexpectedResponse as e:
+                # Index already exists or cannot be created; filtering still works without it
+                logging.warning(f"Payload index on '{field_name}' not created: {e}")
+        
+        # Independent requests, so send them together rather than one round-trip each
+        await asyncio.gather(*(_create(field_name) for field_name in self.PAYLOAD_INDEX_FIELDS))
+        
+        DocumentIndexManager._indexed_collections.add(self.collection_name)
+    
+    async def _ensure_metadata_indexes(self, metadata_col):
+        """Create the rag_metadata indexes behind the cache load and the upsert (once per process)"""
+        if DocumentIndexManager._metadata_indexes_ready:
+            return
+        
+        try:
+            # Covers the initialize() lookup with or without a session, file_hash included
+            await metadata_col.create_index(
+                [("user_id", 1), ("status", 1), ("session_id", 1), ("file_hash", 1)]
+            )
+            # Matches the {file_hash, user_id} upsert filter in IndexDocumentsTool
+            await metadata_col.create_index(
+                [("user_id", 1), ("file_hash", 1)], unique=True
+            )
+        except PyMongoError as e:
+            # Queries still work without the indexes, only slower
+            logging.warning(f"rag_metadata indexes not created: {e}")
+        
+        DocumentIndexManager._metadata_indexes_ready = True
+    
     async def initialize(self):
         """Load cached indexed documents for THIS USER ONLY"""
         db = self.db_manager.db
         metadata_col = db["rag_metadata"]
         
-        # Query filter: only this user's documents
-        query_filter = {
-            "user_id": self.user_id,
-            "status": "completed"
-        }
+        # Qdrant and Mongo index setup do not depend on each other
+        await asyncio.gather(
+            self._ensure_payload_indexes(),
+            self._ensure_metadata_indexes(metadata_col)
+        )
         
-        # If session_id provided, filter by session too
-        if self.session_id:
-            query_filter["session_id"] = self.session_id
+        # Query filter: only this user's documents
+        query_filter = self._metadata_filter()
         
-        cursor = metadata_col.find(query_filter, {"file_hash": 1})
+        cursor = metadata_col.find(query_filter, {"_id": 0, "file_hash": 1}).batch_size(1000)
         
         async for doc in cursor:
-            self._indexed_cache.add(doc["file_hash"])
+            self._indexed_bloom.add(doc["file_hash"])
         
         scope = f"user {self.user_id}" + (f" session {self.session_id}" if self.session_id else "")
-        logging.info(f"✓ Loaded {len(self._indexed_cache)} indexed documents for {scope}")
+        logging.info(f"✓ Loaded {len(self._indexed_bloom)} indexed documents for {scope}")
+    
+    def _metadata_filter(self) -> Dict[str, Any]:
+        """Mongo filter for this user's (and session's) completed documents"""
+        query_filter = {"user_id": self.user_id, "status": "completed"}
+        if self.session_id:
+            query_filter["session_id"] = self.session_id
+        return query_filter
+    
+    @property
+    def indexed_bloom(self) -> ScalableBloomFilter:
+        """Hashes that may be indexed FOR THIS USER; a miss means the file is certainly not indexed"""
+        return self._indexed_bloom
+    
+    def _remember(self, file_hash: str):
+        self._recent_indexed[file_hash] = None
+        self._recent_indexed.move_to_end(file_hash)
+        while len(self._recent_indexed) > self.RECENT_CACHE_SIZE:
+            self._recent_indexed.popitem(last=False)
+    
+    async def filter_indexed(self, file_hashes: List[str]) -> Set[str]:
+        """Return the hashes that are already indexed FOR THIS USER, with one Mongo query for Bloom hits"""
+        indexed = set()
+        unconfirmed = []
+        for file_hash in file_hashes:
+            if file_hash in self._recent_indexed:
+                indexed.add(file_hash)
+            elif file_hash in self._indexed_bloom:
+                unconfirmed.append(file_hash)
+        
+        if unconfirmed:
+            metadata_col = self.db_manager.db["rag_metadata"]
+            query_filter = self._metadata_filter()
+            query_filter["file_hash"] = {"$in": unconfirmed}
+            cursor = metadata_col.find(query_filter, {"_id": 0, "file_hash": 1})
+            for doc in await cursor.to_list(length=None):
+                indexed.add(doc["file_hash"])
+                self._remember(doc["file_hash"])
+        
+        return indexed
     
-    def is_indexed(self, file_hash: str) -> bool:
+    async def is_indexed(self, file_hash: str) -> bool:
         """Check if document is already indexed FOR THIS USER"""
-        return file_hash in self._indexed_cache
+        return file_hash in await self.filter_indexed([file_hash])
     
     async def mark_as_indexed(self, file_hash: str):
         """Mark document as indexed FOR THIS USER"""
         async with self._lock:
-            self._indexed_cache.add(file_hash)
+            self._indexed_bloom.add(file_hash)
+            self._remember(file_hash)
     
     async def get_indexed_count(self) -> int:
-        """Get total number of indexed documents FOR THIS USER"""
-        return len(self._indexed_cache)
+        """Get total number of indexed documents FOR THIS USER (approximate past the Bloom filter's error rate)"""
+        return len(self._indexed_bloom)
     
     def get_user_filter(self) -> List[FieldCondition]:
         """Build Qdrant filter for this user/session"""
@@ -230,6 +762,10 @@ class IndexDocumentsTool(AgentPlugin):
     Tool for indexing PDF documents WITH USER ISOLATION
     """
     
+    # Points per Qdrant upsert, and upserts in flight per document
+    UPSERT_BATCH_SIZE = 100
+    UPSERT_CONCURRENCY = 8
+    
     name = "index_documents"
     description = (
         "💾 PRESERVE: Index PDFs into a personal semantic memory for future retrieval. "
@@ -263,6 +799,7 @@ class IndexDocumentsTool(AgentPlugin):
         index_manager: DocumentIndexManager,
         chunk_size: int = 512,
         chunk_overlap: int = 50,
+        fast_splitter: bool = True,
         logger: Optional[logging.Logger] = None
     ):
         super().__init__()
@@ -270,39 +807,38 @@ class IndexDocumentsTool(AgentPlugin):
         self.index_manager = index_manager
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.fast_splitter = fast_splitter
         self.logger = logger or logging.getLogger(__name__)
         
+        # Used when fast_splitter is disabled
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
-            separators=["\n\n", "\n", ". ", " ", ""]
+            separators=list(_CHUNK_SEPARATORS) + [""]
         )
     
-    def _calculate_file_hash(self, file_path: Path) -> str:
-        """Calculate SHA256 hash"""
-        sha256 = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                sha256.update(chunk)
-        return sha256.hexdigest()
+    def _split_text(self, text: str) -> List[str]:
+        """Split text into overlapping chunks"""
+        if self.fast_splitter:
+            return split_text_fast(text, self.chunk_size, self.chunk_overlap)
+        return self.text_splitter.split_text(text)
     
     def _validate_file_path(self, relative_path: str) -> tuple[bool, str, Optional[Path]]:
         """Validate PDF file path"""
         try:
-            path_obj = Path(relative_path)
-            
-            if "uploaded_files" not in path_obj.parts:
-                relative_path = str(Path("uploaded_files") / path_obj.name)
+            relative_path = _normalize_upload_path(relative_path)
             
             full_path = self.workspace_manager.workspace_path(Path(relative_path))
             
-            if not full_path.exists():
+            try:
+                st = os.stat(full_path)
+            except FileNotFoundError:
                 return False, f"File not found: {relative_path}", None
             
-            if not full_path.is_file():
+            if not stat.S_ISREG(st.st_mode):
                 return False, f"Not a file: {relative_path}", None
             
-            if full_path.suffix.lower() != ".pdf":
+            if not relative_path.lower().endswith(".pdf"):
                 return False, f"Not a PDF: {relative_path}", None
             
             return True, "", full_path
@@ -310,54 +846,74 @@ class IndexDocumentsTool(AgentPlugin):
         except Exception as e:
             return False, f"Invalid path: {str(e)}", None
     
-    async def _extract_pdf_text(self, pdf_path: Path) -> tuple[str, Dict]:
-        """Extract text from PDF"""
-        loop = asyncio.get_event_loop()
+    async def _extract_pdf_text(
+        self,
+        pdf_path: Path
+    ) -> tuple[List[str], Dict]:
+        """Extract non-empty page texts from PDF in a worker process"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_pdf_pool(), _extract_pdf_text_worker, str(pdf_path)
+        )
+    
+    async def _hash_and_extract(
+        self,
+        pdf_path: Path,
+        skip_hashes: Optional[ScalableBloomFilter]
+    ) -> tuple[str, Optional[tuple[List[str], Dict]]]:
+        """Hash a PDF and extract its text in one read in a worker process, caching the hash"""
+        key = _hash_cache_key(pdf_path)
+        loop = asyncio.get_running_loop()
+        file_hash, extracted = await loop.run_in_executor(
+            _get_pdf_pool(), _hash_and_extract_worker, str(pdf_path), skip_hashes
+        )
+        _hash_cache_put(key, file_hash)
+        return file_hash, extracted
+    
+    async def _prepare_document(
+        self,
+        file_hash: str,
+        file_path: str,
+        full_path: Path,
+        extracted: Optional[tuple[List[str], Dict]] = None
+    ) -> Dict[str, Any]:
+        """Extract (unless already done while hashing) and chunk a single document"""
+        if extracted is None:
+            self.logger.info(f"📖 Extracting: {file_path}")
+            extracted = await self._extract_pdf_text(full_path)
+        pages, metadata = extracted
         
-        def _extract():
-            doc = pymupdf.open(pdf_path)
-            metadata = {
-                "total_pages": doc.page_count,
-                "title": doc.metadata.get("title", ""),
-                "author": doc.metadata.get("author", "")
-            }
-            
-            text = ""
-            for page_num in range(doc.page_count):
-                page = doc.load_page(page_num)
-                page_text = page.get_text("text")
-                if page_text.strip():
-                    text += f"\n--- Page {page_num + 1} ---\n{page_text}"
-            
-            doc.close()
-            return text.strip(), metadata
+        if not pages:
+            raise ValueError("No text content in PDF")
         
-        return await loop.run_in_executor(None, _extract)
+        # Split page by page so the whole document is never held as one string
+        chunks = []
+        for page_text in pages:
+            chunks.extend(self._split_text(page_text))
+        self.logger.info(f"📝 {file_path}: split into {len(chunks)} chunks")
+        
+        return {
+            "file_hash": file_hash,
+            "file_path": file_path,
+            "chunks": chunks,
+            "metadata": metadata
+        }
     
-    async def _index_single_document(
+    async def _store_document(
         self,
         file_hash: str,
         file_path: str,
-        full_path: Path
+        chunks: List[str],
+        metadata: Dict,
+        embeddings: List[List[float]]
     ) -> Dict[str, Any]:
-        """Index a single document FOR THIS USER"""
+        """Store an embedded document FOR THIS USER"""
         try:
-            # Extract text
-            self.logger.info(f"📖 Extracting: {file_path}")
-            text, metadata = await self._extract_pdf_text(full_path)
-            
-            if not text.strip():
-                raise ValueError("No text content in PDF")
-            
-            # Split into chunks
-            chunks = self.text_splitter.split_text(text)
-            self.logger.info(f"📝 Split into {len(chunks)} chunks")
-            
-            # Batch embed
-            self.logger.info(f"🔄 Generating embeddings...")
-            embeddings = await self.index_manager.embeddings.embed_texts(chunks)
-            
-            # Create Qdrant points with USER and SESSION isolation
+            # Create Qdrant points with USER and SESSION isolation. IDs are derived from
+            # owner, file and chunk index so re-indexing overwrites instead of duplicating
+            id_prefix = f"{self.index_manager.user_id}:{self.index_manager.session_id or ''}:{file_hash}"
+            indexed_at = datetime.utcnow()
+            indexed_at_iso = indexed_at.isoformat()
             points = []
             for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
                 payload = {
@@ -369,7 +925,7 @@ class IndexDocumentsTool(AgentPlugin):
                     "total_chunks": len(chunks),
                     "title": metadata.get("title", ""),
                     "author": metadata.get("author", ""),
-                    "indexed_at": datetime.utcnow().isoformat()
+                    "indexed_at": indexed_at_iso
                 }
                 
                 # Add session_id if available
@@ -377,20 +933,26 @@ class IndexDocumentsTool(AgentPlugin):
                     payload["session_id"] = self.index_manager.session_id
                 
                 point = PointStruct(
-                    id=str(uuid.uuid4()),
+                    id=str(uuid.uuid5(_POINT_ID_NAMESPACE, f"{id_prefix}:{i}")),
                     vector=embedding,
                     payload=payload
                 )
                 points.append(point)
             
-            # Upload to Qdrant in batches
-            batch_size = 100
-            for i in range(0, len(points), batch_size):
-                batch = points[i:i + batch_size]
-                await self.index_manager.qdrant.upsert(
-                    collection_name=self.index_manager.collection_name,
-                    points=batch
-                )
+            # Upload to Qdrant in concurrent batches
+            upload_slots = asyncio.Semaphore(self.UPSERT_CONCURRENCY)
+            
+            async def _upsert(batch: List[PointStruct]):
+                async with upload_slots:
+                    await self.index_manager.qdrant.upsert(
+                        collection_name=self.index_manager.collection_name,
+                        points=batch
+                    )
+            
+            await asyncio.gather(*(
+                _upsert(points[i:i + self.UPSERT_BATCH_SIZE])
+                for i in range(0, len(points), self.UPSERT_BATCH_SIZE)
+            ))
             
             # Save metadata to MongoDB with USER and SESSION
             db = self.index_manager.db_manager.db
@@ -403,7 +965,7 @@ class IndexDocumentsTool(AgentPlugin):
                 "chunk_count": len(chunks),
                 "total_pages": metadata.get("total_pages", 0),
                 "status": "completed",
-                "indexed_at": datetime.utcnow(),
+                "indexed_at": indexed_at,
                 "pdf_metadata": metadata
             }
             
@@ -440,6 +1002,89 @@ class IndexDocumentsTool(AgentPlugin):
                 "error": str(e)
             }
     
+    async def _embed_and_store(
+        self,
+        doc: Dict[str, Any],
+        lo: int,
+        hi: int,
+        spans: List[tuple[int, int]],
+        embed_tasks: List["asyncio.Task[np.ndarray]"]
+    ) -> Dict[str, Any]:
+        """Wait for the embedding batches covering chunks [lo, hi), then store the document"""
+        embeddings: List[List[float]] = []
+        covering = [i for i, (start, end) in enumerate(spans) if start < hi and end > lo]
+        if covering:
+            try:
+                batch_results = await asyncio.gather(*(embed_tasks[i] for i in covering))
+            except Exception as e:
+                self.logger.error(f"❌ Failed to embed {doc['file_path']}: {e}")
+                return {"success": False, "file_path": doc["file_path"], "error": str(e)}
+            
+            first = spans[covering[0]][0]
+            # One C-level conversion per document instead of per-vector lists
+            embeddings = np.concatenate(batch_results)[lo - first:hi - first].tolist()
+        
+        return await self._store_document(
+            doc["file_hash"],
+            doc["file_path"],
+            doc["chunks"],
+            doc["metadata"],
+            embeddings
+        )
+    
+    async def _index_documents(
+        self,
+        validated_files: List[tuple[str, str, Path, Optional[tuple[List[str], Dict]]]]
+    ) -> List[Dict[str, Any]]:
+        """Index documents, pipelining shared embedding batches into per-document upserts"""
+        prepared = await asyncio.gather(
+            *(
+                self._prepare_document(file_hash, file_path_str, full_path, extracted)
+                for file_hash, file_path_str, full_path, extracted in validated_files
+            ),
+            return_exceptions=True
+        )
+        
+        results = []
+        ready = []
+        for (_, file_path_str, _, _), item in zip(validated_files, prepared):
+            if isinstance(item, Exception):
+                self.logger.error(f"❌ Failed to index {file_path_str}: {item}")
+                results.append({"success": False, "file_path": file_path_str, "error": str(item)})
+            else:
+                ready.append(item)
+        
+        if not ready:
+            return results
+        
+        # Embed every document's chunks in shared batches; each document is stored
+        # as soon as the batches covering it finish, while later batches are still running
+        embedder = self.index_manager.embeddings
+        all_chunks = [chunk for doc in ready for chunk in doc["chunks"]]
+        spans = embedder.plan_batches(all_chunks)
+        self.logger.info(
+            f"🔄 Generating embeddings for {len(all_chunks)} chunks from {len(ready)} document(s) "
+            f"in {len(spans)} batch(es)..."
+        )
+        embed_tasks = [
+            asyncio.create_task(embedder.embed_texts(all_chunks[lo:hi]))
+            for lo, hi in spans
+        ]
+        
+        store_tasks = []
+        offset = 0
+        for doc in ready:
+            count = len(doc["chunks"])
+            store_tasks.append(
+                self._embed_and_store(doc, offset, offset + count, spans, embed_tasks)
+            )
+            offset += count
+        
+        results.extend(await asyncio.gather(*store_tasks))
+        # Failed batches were already reported per document
+        await asyncio.gather(*embed_tasks, return_exceptions=True)
+        return results
+    
     async def run_impl(
         self,
         tool_input: Dict[str, Any],
@@ -456,21 +1101,42 @@ class IndexDocumentsTool(AgentPlugin):
         validated_files = []
         errors = []
         
+        # Validate paths and look up cached hashes; only files not seen before need hashing
+        candidates = []
         for file_path_str in file_paths:
             is_valid, error_msg, full_path = self._validate_file_path(file_path_str)
-            
             if not is_valid:
                 errors.append(f"❌ {file_path_str}: {error_msg}")
                 continue
-            
-            file_hash = self._calculate_file_hash(full_path)
-            
+            candidates.append((file_path_str, full_path, peek_file_hash(full_path)))
+        
+        # Cache misses are hashed and extracted together in worker processes, from one memory
+        # map of the file. Files that may already be indexed are only hashed
+        skip_hashes = None if force_reindex else self.index_manager.indexed_bloom
+        hashed = iter(await asyncio.gather(*(
+            self._hash_and_extract(full_path, skip_hashes)
+            for _, full_path, cached_hash in candidates
+            if cached_hash is None
+        )))
+        
+        resolved = []
+        for file_path_str, full_path, file_hash in candidates:
+            extracted = None
+            if file_hash is None:
+                file_hash, extracted = next(hashed)
+            resolved.append((file_hash, file_path_str, full_path, extracted))
+        
+        already_indexed = set()
+        if not force_reindex:
+            already_indexed = await self.index_manager.filter_indexed([r[0] for r in resolved])
+        
+        for file_hash, file_path_str, full_path, extracted in resolved:
             # Check if already indexed FOR THIS USER
-            if self.index_manager.is_indexed(file_hash) and not force_reindex:
+            if file_hash in already_indexed:
                 self.logger.info(f"⏭️  Skipping (already indexed): {file_path_str}")
                 continue
             
-            validated_files.append((file_hash, file_path_str, full_path))
+            validated_files.append((file_hash, file_path_str, full_path, extracted))
         
         if not validated_files and not errors:
             return AgentImplOutput(
@@ -486,20 +1152,12 @@ class IndexDocumentsTool(AgentPlugin):
                 }
             )
         
-        # Index new documents in parallel
-        tasks = [
-            self._index_single_document(file_hash, file_path_str, full_path)
-            for file_hash, file_path_str, full_path in validated_files
-        ]
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Index new documents, sharing embedding requests across them
+        results = await self._index_documents(validated_files)
         stats_after = self.index_manager.embeddings.get_token_stats()
         
         tokens_used = stats_after["total_embedding_tokens"] - stats_before["total_embedding_tokens"]
         cost_used = stats_after["total_cost"] - stats_before["total_cost"]
-        
-        if tokens_used > 0:
-            summary += f"\n\n📊 Embedding tokens used: {tokens_used:,} (${cost_used:.6f})"
 
         # Process results
         successful = []
@@ -567,6 +1225,10 @@ class SearchDocumentsTool(AgentPlugin):
     Tool for searching indexed documents WITH USER ISOLATION
     """
     
+    # Search result cache bounds
+    QUERY_CACHE_SIZE = 1024
+    QUERY_CACHE_TTL = 300  # seconds
+    
     name = "search_documents"
     description = (
         "🔍 RECALL: Semantic search across indexed documents to retrieve specific information. "
@@ -617,14 +1279,39 @@ class SearchDocumentsTool(AgentPlugin):
         self.workspace_manager = workspace_manager
         self.index_manager = index_manager
         self.logger = logger or logging.getLogger(__name__)
+        
+        # Recent search outputs: key -> (monotonic timestamp, output)
+        self._query_cache: OrderedDict[tuple, tuple[float, AgentImplOutput]] = OrderedDict()
+    
+    def _get_cached_result(self, key: tuple) -> Optional[AgentImplOutput]:
+        """Return a fresh cached search output, reporting no embedding spend"""
+        entry = self._query_cache.get(key)
+        if entry is None:
+            return None
+        
+        cached_at, output = entry
+        if time.monotonic() - cached_at >= self.QUERY_CACHE_TTL:
+            del self._query_cache[key]
+            return None
+        
+        self._query_cache.move_to_end(key)
+        return AgentImplOutput(
+            output.tool_output,
+            output.tool_result_message,
+            {
+                **output.auxiliary_data,
+                "embedding_tokens_used": 0,
+                "embedding_cost": 0.0,
+                "cached": True,
+            }
+        )
     
-    def _calculate_file_hash(self, file_path: Path) -> str:
-        """Calculate file hash"""
-        sha256 = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                sha256.update(chunk)
-        return sha256.hexdigest()
+    def _cache_result(self, key: tuple, output: AgentImplOutput):
+        """Remember a search output, evicting the least recently used entries"""
+        self._query_cache[key] = (time.monotonic(), output)
+        self._query_cache.move_to_end(key)
+        while len(self._query_cache) > self.QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
     
     async def run_impl(
         self,
@@ -653,13 +1340,12 @@ class SearchDocumentsTool(AgentPlugin):
         
         # Build filter - ALWAYS includes user_id
         must_conditions = self.index_manager.get_user_filter()
+        file_hash = None
         
         # If specific file requested
         if file_path_str:
             try:
-                path_obj = Path(file_path_str)
-                if "uploaded_files" not in path_obj.parts:
-                    file_path_str = str(Path("uploaded_files") / path_obj.name)
+                file_path_str = _normalize_upload_path(file_path_str)
                 
                 full_path = self.workspace_manager.workspace_path(Path(file_path_str))
                 
@@ -671,10 +1357,10 @@ class SearchDocumentsTool(AgentPlugin):
                         "embedding_cost": 0.0}
                     )
                 
-                file_hash = self._calculate_file_hash(full_path)
+                file_hash = cached_file_hash(full_path)
                 
                 # Check if this file is indexed FOR THIS USER
-                if not self.index_manager.is_indexed(file_hash):
+                if not await self.index_manager.is_indexed(file_hash):
                     return AgentImplOutput(
                         f"Document '{file_path_str}' is not indexed. Use 'index_documents' first.",
                         "Document not indexed",
@@ -697,6 +1383,21 @@ class SearchDocumentsTool(AgentPlugin):
                     "embedding_cost": 0.0,}
                 )
         
+        # Indexed count is part of the key so newly indexed documents invalidate old results
+        cache_key = (
+            self.index_manager.user_id,
+            self.index_manager.session_id,
+            file_hash,
+            query.strip().lower(),
+            top_k,
+            min_score,
+            indexed_count,
+        )
+        cached = self._get_cached_result(cache_key)
+        if cached is not None:
+            self.logger.info("⚡ Returning cached search results")
+            return cached
+        
         try:
             # Generate query embedding
             self.logger.info("🔄 Generating query embedding...")
@@ -714,14 +1415,18 @@ class SearchDocumentsTool(AgentPlugin):
                 query_filter=Filter(must=must_conditions),  # USER FILTER
                 limit=top_k,
                 score_threshold=min_score,
-                with_payload=True
+                with_payload=True,
+                # Rescore oversampled int8 candidates with the original vectors
+                search_params=SearchParams(
+                    quantization=QuantizationSearchParams(rescore=True, oversampling=2.0)
+                )
             )
             
             results = response.points if response else []
             
             if not results:
                 scope = f"in '{file_path_str}'" if file_path_str else f"across your {indexed_count} document(s)"
-                return AgentImplOutput(
+                output = AgentImplOutput(
                     f"No relevant information found {scope} for: '{query}'",
                     "No results found",
                     {
@@ -733,6 +1438,8 @@ class SearchDocumentsTool(AgentPlugin):
                         "embedding_cost": cost_used,
                     }
                 )
+                self._cache_result(cache_key, output)
+                return output
             
             # Format results
             context_parts = []
@@ -753,7 +1460,7 @@ class SearchDocumentsTool(AgentPlugin):
                 f"Sources: {', '.join(source_files)}"
             )
             
-            return AgentImplOutput(
+            output = AgentImplOutput(
                 context,
                 summary,
                 {
@@ -766,6 +1473,8 @@ class SearchDocumentsTool(AgentPlugin):
                     "embedding_cost": cost_used,
                 }
             )
+            self._cache_result(cache_key, output)
+            return output
             
         except Exception as e:
             self.logger.error(f"❌ Search error: {e}", exc_info=True)
@@ -791,9 +1500,17 @@ class SearchDocumentsTool(AgentPlugin):
             )
 
 class PDFTextReader(AgentPlugin):
-    """Enhanced PDF text extraction tool with page-based access and better error handling."""
+    """
+    Enhanced PDF text extraction tool with page-based access and better error handling.
+    Plain text is read through PDFium when pypdfium2 is installed (backend="pdfium"),
+    which avoids MuPDF's object store growing across calls; PyMuPDF is the fallback.
+    With PyMuPDF the store is emptied after a call once it exceeds ``mupdf_store_limit``
+    bytes, trading some re-decoding of shared resources for a predictable RSS.
+    """
     
     name = "pdf_content_extract"
+    # Bump when the cached output's shape or meaning changes, so older entries are not served
+    OUTPUT_CACHE_VERSION = 2
     description = (
         "🔍 SCOUT (Short Reads Only): Extracts raw text from specific pages (limit 1-5 pages). "
         "Use ONLY for: 1. Documents under 5 pages. 2. Reading the Table of Contents/Intro (pages 1-3) to plan a RAG strategy. "
@@ -830,35 +1547,184 @@ class PDFTextReader(AgentPlugin):
         self,
         workspace_manager: WorkspaceManager,
         max_output_length: int = 15000,
+        backend: Literal["pymupdf", "pdfium"] = "pdfium",
+        parallel_page_threshold: int = 16,
+        cache_max_entries: int = 256,
+        doc_cache_size: int = 8,
+        mupdf_store_limit: int = _MUPDF_STORE_LIMIT,
+        max_output_bytes: Optional[int] = None,
         logger: Optional[logging.Logger] = None
     ):
         super().__init__()
         self.workspace_manager = workspace_manager
         self.max_output_length = max_output_length
+        # UTF-8 budget for the returned text; the default leaves room for two bytes per character,
+        # so Latin and most European text is unaffected while CJK output is capped
+        self.max_output_bytes = max_output_bytes if max_output_bytes is not None else max_output_length * 2
+        self.parallel_page_threshold = parallel_page_threshold
+        self.cache_max_entries = cache_max_entries
+        self.mupdf_store_limit = mupdf_store_limit
+        self.doc_cache_size = doc_cache_size
+        
+        # Open documents shared across calls: path -> (mtime_ns, document, document lock)
+        self._doc_lru: OrderedDict[str, tuple[int, Any, threading.Lock]] = OrderedDict()
+        self._doc_lock = threading.Lock()
+        
+        # (path, mtime_ns) -> metadata, so repeat calls skip the metadata read
+        self._metadata_cache: OrderedDict[tuple[str, int], PdfMetadata] = OrderedDict()
+        self._metadata_lock = threading.Lock()
         self.logger = logger or logging.getLogger(__name__)
+        
+        if backend == "pdfium" and not HAS_PYPDFIUM2:
+            self.logger.warning("pypdfium2 not installed, falling back to the pymupdf backend")
+            backend = "pymupdf"
+        self.backend = backend
+        
+        # Errors raised by the active backend for unreadable PDFs
+        self._corrupt_errors: tuple = (
+            (pdfium.PdfiumError,) if backend == "pdfium" else (pymupdf.FileDataError,)
+        )
+    
+    def _open_document(self, full_path: Path):
+        """Open the PDF with the configured backend (pypdfium2.PdfDocument or pymupdf.Document)"""
+        if self.backend == "pdfium":
+            return pdfium.PdfDocument(str(full_path))
+        return pymupdf.open(full_path)
+    
+    def _is_closed(self, doc) -> bool:
+        """Whether a pypdfium2 or pymupdf document handle has been closed"""
+        if self.backend == "pdfium":
+            return doc.raw is None
+        return doc.is_closed
+    
+    def _get_doc(self, full_path: Path, mtime_ns: int) -> tuple[Any, threading.Lock]:
+        """Return an open document for the path, reusing a cached handle when the file is unchanged"""
+        key = str(full_path)
+        dropped = []
+        
+        try:
+            with self._doc_lock:
+                cached = self._doc_lru.get(key)
+                if cached is not None and cached[0] == mtime_ns:
+                    self._doc_lru.move_to_end(key)
+                    return cached[1], cached[2]
+                if cached is not None:
+                    # File changed on disk, drop the stale handle
+                    dropped.append(self._doc_lru.pop(key))
+                
+                doc = self._open_document(full_path)
+                lock = threading.Lock()
+                self._doc_lru[key] = (mtime_ns, doc, lock)
+                while len(self._doc_lru) > self.doc_cache_size:
+                    dropped.append(self._doc_lru.popitem(last=False)[1])
+                return doc, lock
+        finally:
+            # Closing waits for in-flight extractions, so do it without blocking other lookups
+            for entry in dropped:
+                self._close_cached(entry)
+    
+    @staticmethod
+    def _close_cached(entry: tuple[int, Any, threading.Lock]) -> None:
+        """Close a cached document once no caller is using it"""
+        _, doc, lock = entry
+        with lock:
+            doc.close()
+    
+    @contextmanager
+    def _open_doc(self, full_path: Path, file_stat: os.stat_result) -> Iterator[Any]:
+        """Yield a cached document, holding its lock since neither backend's documents are reentrant"""
+        if self.doc_cache_size <= 0:
+            doc = self._open_document(full_path)
+            try:
+                yield doc
+            finally:
+                doc.close()
+            return
+        
+        while True:
+            doc, lock = self._get_doc(full_path, file_stat.st_mtime_ns)
+            with lock:
+                # Another call may have evicted and closed it before we got the lock
+                if not self._is_closed(doc):
+                    yield doc
+                    return
+    
+    def close(self) -> None:
+        """Close all cached documents"""
+        # PDFium handles may only be touched under the module-wide lock
+        with _PDFIUM_LOCK if self.backend == "pdfium" else nullcontext():
+            with self._doc_lock:
+                entries = list(self._doc_lru.values())
+                self._doc_lru.clear()
+            for entry in entries:
+                self._close_cached(entry)
+    
+    def _get_page_text(self, doc, page_num: int) -> str:
+        """Extract the plain text of one 0-based page"""
+        return _read_page_text(doc, self.backend, page_num)
+    
+    def _iter_page_texts(self, doc, full_path: Optional[Path], start_page: int, end_page: int):
+        """
+        Yield (page_num, text, error) for the 0-based pages of a 1-based range, in order.
+        Ranges of at least parallel_page_threshold pages are split into contiguous slices
+        extracted in the shared process pool, each worker opening the PDF once.
+        """
+        n_pages = end_page - start_page + 1
+        workers = min(os.cpu_count() or 1, n_pages)
+        
+        if full_path is None or self.parallel_page_threshold <= 0 \
+                or n_pages < self.parallel_page_threshold or workers < 2:
+            check_store = self.backend == "pymupdf"
+            for page_num in range(start_page - 1, end_page):
+                try:
+                    yield page_num, self._get_page_text(doc, page_num), None
+                except Exception as e:
+                    yield page_num, "", str(e)
+                # Keep long ranges from piling up fonts and images in MuPDF's store
+                if check_store and (page_num - start_page + 2) % _STORE_CHECK_INTERVAL == 0:
+                    _trim_mupdf_store(self.mupdf_store_limit)
+            return
+        
+        step = -(-n_pages // workers)
+        futures = [
+            _get_pdf_pool().submit(
+                _extract_page_range_worker, str(full_path), self.backend, lo, min(lo + step, end_page)
+            )
+            for lo in range(start_page - 1, end_page, step)
+        ]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # The caller stopped early, so slices not started yet are not needed
+            for future in futures:
+                future.cancel()
 
-    def _validate_file_path(self, relative_path: str) -> tuple[bool, str, Optional[Path]]:
-        """Validate the file path and return validation result."""
+    def _validate_file_path(
+        self, relative_path: str
+    ) -> tuple[bool, str, Optional[Path], Optional[os.stat_result]]:
+        """Validate the file path and return validation result along with the file's stat."""
         try:
             # Ensure the path points inside 'uploaded_files' if not already
-            if "uploaded_files" not in Path(relative_path).parts:
-                relative_path = str(Path("uploaded_files") / Path(relative_path).name)
+            relative_path = _normalize_upload_path(relative_path)
     
             full_path = self.workspace_manager.workspace_path(Path(relative_path))
     
-            if not full_path.exists():
-                return False, f"File not found at {relative_path}", None
+            try:
+                st = os.stat(full_path)
+            except FileNotFoundError:
+                return False, f"File not found at {relative_path}", None, None
     
-            if not full_path.is_file():
-                return False, f"Path {relative_path} is not a file", None
+            if not stat.S_ISREG(st.st_mode):
+                return False, f"Path {relative_path} is not a file", None, None
     
-            if full_path.suffix.lower() != ".pdf":
-                return False, f"File {relative_path} is not a PDF", None
+            if not relative_path.lower().endswith(".pdf"):
+                return False, f"File {relative_path} is not a PDF", None, None
     
-            return True, "", full_path
+            return True, "", full_path, st
     
         except Exception as e:
-            return False, f"Invalid file path: {str(e)}", None
+            return False, f"Invalid file path: {str(e)}", None, None
 
 
     def _validate_page_range(self, start_page: Optional[int], end_page: Optional[int], 
@@ -887,47 +1753,116 @@ class PDFTextReader(AgentPlugin):
             
         return True, "", start, end
 
-    def _extract_metadata(self, doc: pymupdf.Document) -> dict[str, Any]:
+    def _get_metadata(self, doc, full_path: Path, mtime_ns: int) -> PdfMetadata:
+        """Return the document's metadata, reusing it while the file is unchanged."""
+        key = (str(full_path), mtime_ns)
+        with self._metadata_lock:
+            metadata = self._metadata_cache.get(key)
+            if metadata is not None:
+                self._metadata_cache.move_to_end(key)
+                return metadata
+        
+        metadata = self._extract_metadata(doc)
+        with self._metadata_lock:
+            self._metadata_cache[key] = metadata
+            while len(self._metadata_cache) > 128:
+                self._metadata_cache.popitem(last=False)
+        return metadata
+
+    def _extract_metadata(self, doc) -> PdfMetadata:
         """Extract metadata from PDF document."""
         try:
-            metadata = doc.metadata
-            return {
-                "title": metadata.get("title", ""),
-                "author": metadata.get("author", ""),
-                "subject": metadata.get("subject", ""),
-                "creator": metadata.get("creator", ""),
-                "producer": metadata.get("producer", ""),
-                "creation_date": metadata.get("creationDate", ""),
-                "modification_date": metadata.get("modDate", ""),
-                "total_pages": doc.page_count
-            }
+            if self.backend == "pdfium":
+                raw, keys = doc.get_metadata_dict(), _PDFIUM_METADATA_KEYS
+            else:
+                raw, keys = doc.metadata, _PYMUPDF_METADATA_KEYS
+            return PdfMetadata(total_pages=len(doc), **{field: raw.get(src, "") for field, src in keys})
+        except Exception as e:
+            self.logger.warning("Failed to extract metadata: %s", e)
+            return PdfMetadata(total_pages=len(doc))
+
+    def _extract_single_page(self, doc, page: int) -> tuple[str, dict[str, Any], int, bool]:
+        """_extract_text_from_pages for a one-page range (the usual scout call), without its loop machinery."""
+        try:
+            page_text = self._get_page_text(doc, page - 1)
         except Exception as e:
-            self.logger.warning(f"Failed to extract metadata: {str(e)}")
-            return {"total_pages": doc.page_count}
+            self.logger.error("Failed to extract text from page %s: %s", page, e)
+            return "", {"page_range_start": page, "page_lengths": [{"error": str(e)}]}, page, False
+        
+        if not page_text or page_text.isspace():
+            return "", {"page_range_start": page, "page_lengths": [0]}, page, False
+        
+        text = f"\n--- Page {page} ---\n{page_text}"
+        truncated = False
+        if len(text) > self.max_output_length + 1:
+            removed = text[self.max_output_length + 1:]
+            # Trailing whitespace would be stripped anyway; only losing content counts as truncation
+            truncated = not removed.isspace()
+            text = text[:self.max_output_length + 1]
+        return text.strip(), {"page_range_start": page, "page_lengths": [len(page_text)]}, page, truncated
 
-    def _extract_text_from_pages(self, doc: pymupdf.Document, start_page: int, 
-                                end_page: int) -> tuple[str, dict[str, Any]]:
-        """Extract text from specified page range."""
-        extracted_text = ""
-        page_info = {}
+    def _extract_text_from_pages(self, doc, start_page: int, 
+                                end_page: int, full_path: Optional[Path] = None
+                                ) -> tuple[str, dict[str, Any], int, bool]:
+        """
+        Extract text from specified page range.
+        Stops once the collected text exceeds max_output_length, since later pages
+        would be truncated away, and cuts the text to that length before joining it.
+        The last page actually processed is returned too, along with whether any
+        content was cut or left unread (whitespace removed by the final strip does not count).
+        Passing full_path allows large ranges to be extracted in worker processes.
         
-        for page_num in range(start_page - 1, end_page):  # Convert to 0-based indexing
-            try:
-                page = doc.load_page(page_num)
-                page_text = page.get_text("text")
-                
-                if page_text.strip():  # Only add non-empty pages
-                    extracted_text += f"\n--- Page {page_num + 1} ---\n"
-                    extracted_text += page_text
-                    page_info[f"page_{page_num + 1}"] = len(page_text)
-                else:
-                    page_info[f"page_{page_num + 1}"] = 0
-                    
-            except Exception as e:
-                self.logger.error(f"Failed to extract text from page {page_num + 1}: {str(e)}")
-                page_info[f"page_{page_num + 1}_error"] = str(e)
+        ``page_info["page_lengths"]`` holds one entry per processed page, starting at
+        ``page_info["page_range_start"]``: its character count, or ``{"error": ...}``.
+        """
+        if start_page == end_page:
+            return self._extract_single_page(doc, start_page)
+        
+        parts: list[str] = []
+        append = parts.append
+        size = 0  # characters collected, headers included
+        max_chars = self.max_output_length
+        headers = [f"\n--- Page {n} ---\n" for n in range(start_page, end_page + 1)]
+        page_lengths: list[Any] = [0] * len(headers)
+        last_page = start_page - 1
+        
+        page_texts = self._iter_page_texts(doc, full_path, start_page, end_page)
+        for page_num, page_text, error in page_texts:  # page_num is 0-based
+            last_page = page_num + 1
+            idx = last_page - start_page
+            if error is not None:
+                self.logger.error("Failed to extract text from page %s: %s", last_page, error)
+                page_lengths[idx] = {"error": error}
+            elif page_text and not page_text.isspace():  # Only add non-empty pages, without copying them
+                n_chars = len(page_text)
+                append(headers[idx])
+                append(page_text)
+                size += len(headers[idx]) + n_chars
+                page_lengths[idx] = n_chars
                 
-        return extracted_text.strip(), page_info
+                # The final strip drops the leading newline and this page's trailing whitespace,
+                # so only stop (and lose the remaining pages) once real content is over the limit
+                if size > max_chars and size - 1 - (n_chars - len(page_text.rstrip())) > max_chars:
+                    page_texts.close()
+                    break
+        
+        truncated = False
+        
+        # Drop whatever lies past the limit (plus the first header's newline, stripped below)
+        excess = size - max_chars - 1
+        while excess > 0:
+            if excess >= len(parts[-1]):
+                removed = parts.pop()
+                excess -= len(removed)
+            else:
+                removed = parts[-1][-excess:]
+                parts[-1] = parts[-1][:-excess]
+                excess = 0
+            truncated = truncated or not removed.isspace()
+        
+        del page_lengths[last_page - start_page + 1:]
+        page_info = {"page_range_start": start_page, "page_lengths": page_lengths}
+        return "".join(parts).strip(), page_info, last_page, truncated
 
     async def run_impl(self,
                       tool_input: dict[str, Any],
@@ -941,7 +1876,7 @@ class PDFTextReader(AgentPlugin):
         include_metadata = tool_input.get("include_metadata", False)
         
         # Validate file path
-        is_valid, error_msg, full_file_path = self._validate_file_path(relative_file_path)
+        is_valid, error_msg, full_file_path, file_stat = self._validate_file_path(relative_file_path)
         if not is_valid:
             return AgentImplOutput(
                 f"Error: {error_msg}",
@@ -949,30 +1884,143 @@ class PDFTextReader(AgentPlugin):
                 {"success": False, "error": error_msg},
             )
 
+        # MuPDF/PDFium calls block, so run the whole extraction in a worker thread
+        return await asyncio.to_thread(
+            self._extract_sync,
+            full_file_path,
+            file_stat,
+            relative_file_path,
+            start_page,
+            end_page,
+            include_metadata,
+        )
+
+    def _cache_path(self,
+                    full_file_path: Path,
+                    relative_file_path: str,
+                    start_page: Optional[int],
+                    end_page: Optional[int],
+                    include_metadata: bool) -> Path:
+        """
+        Location of the cached output for this request, keyed by the file's content.
+        The path, backend and length limit only change the output text, so they go
+        into a short suffix rather than invalidating by content.
+        """
+        content_hash = cached_fast_hash(full_file_path)
+        variant = hashlib.blake2b(
+            f"{self.OUTPUT_CACHE_VERSION}|{relative_file_path}|{self.backend}|"
+            f"{self.max_output_length}|{self.max_output_bytes}".encode(), digest_size=4
+        ).hexdigest()
+        name = f"{content_hash}_{start_page}_{end_page}_{int(include_metadata)}_{variant}.json"
+        return self.workspace_manager.root / ".cache" / "pdf_text" / name
+    
+    def _load_cached_output(self, cache_path: Path) -> Optional[AgentImplOutput]:
+        """Return the cached output, marking the entry as recently used"""
         try:
-            # Open PDF document
-            doc = pymupdf.open(full_file_path)
-            total_pages = doc.page_count
+            with open(cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+            os.utime(cache_path)
+        except (OSError, ValueError):
+            return None
+        return AgentImplOutput(
+            cached["tool_output"], cached["tool_result_message"], cached["auxiliary_data"]
+        )
+    
+    def _store_cached_output(self, cache_path: Path, output: AgentImplOutput):
+        """Write the output atomically, then evict the least recently used entries"""
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.{threading.get_ident()}")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "tool_output": output.tool_output,
+                    "tool_result_message": output.tool_result_message,
+                    "auxiliary_data": output.auxiliary_data
+                }, f)
+            os.replace(tmp_path, cache_path)
             
-            # Validate page range
-            is_valid_range, range_error, start, end = self._validate_page_range(
-                start_page, end_page, total_pages
-            )
-            if not is_valid_range:
-                doc.close()
-                return AgentImplOutput(
-                    f"Error: {range_error}",
-                    f"Page range validation failed: {range_error}",
-                    {"success": False, "error": range_error},
+            entries = list(os.scandir(cache_path.parent))
+            if len(entries) > self.cache_max_entries:
+                entries.sort(key=lambda e: e.stat().st_mtime_ns)
+                for entry in entries[:len(entries) - self.cache_max_entries]:
+                    os.remove(entry.path)
+        except OSError as e:
+            self.logger.warning(f"Failed to cache extracted text: {str(e)}")
+    
+    def _extract_sync(self,
+                      full_file_path: Path,
+                      file_stat: os.stat_result,
+                      relative_file_path: str,
+                      start_page: Optional[int],
+                      end_page: Optional[int],
+                      include_metadata: bool) -> AgentImplOutput:
+        """Open the document, extract the requested pages and build the tool output (blocking)."""
+        cache_path = None
+        if self.cache_max_entries > 0:
+            try:
+                cache_path = self._cache_path(
+                    full_file_path, relative_file_path, start_page, end_page, include_metadata
                 )
+            except OSError as e:
+                self.logger.warning(f"Failed to hash {relative_file_path} for the text cache: {str(e)}")
+        
+        if cache_path is not None:
+            cached = self._load_cached_output(cache_path)
+            if cached is not None:
+                return cached
+        
+        if self.backend == "pdfium":
+            # PDFium is not thread-safe, so concurrent calls take turns
+            with _PDFIUM_LOCK:
+                output = self._extract_pages_output(
+                    full_file_path, file_stat, relative_file_path, start_page, end_page, include_metadata
+                )
+        else:
+            try:
+                output = self._extract_pages_output(
+                    full_file_path, file_stat, relative_file_path, start_page, end_page, include_metadata
+                )
+            finally:
+                _trim_mupdf_store(self.mupdf_store_limit)
+        
+        if cache_path is not None and output.auxiliary_data.get("success"):
+            self._store_cached_output(cache_path, output)
+        return output
+
+    def _extract_pages_output(self,
+                              full_file_path: Path,
+                              file_stat: os.stat_result,
+                              relative_file_path: str,
+                              start_page: Optional[int],
+                              end_page: Optional[int],
+                              include_metadata: bool) -> AgentImplOutput:
+        """Extraction body shared by both backends."""
+        try:
+            # Open PDF document (a cached handle, held exclusively until we are done with it)
+            with self._open_doc(full_file_path, file_stat) as doc:
+                total_pages = len(doc)
             
-            # Extract text from specified pages
-            extracted_text, page_info = self._extract_text_from_pages(doc, start, end)
+                # Validate page range
+                is_valid_range, range_error, start, end = self._validate_page_range(
+                    start_page, end_page, total_pages
+                )
+                if not is_valid_range:
+                    return AgentImplOutput(
+                        f"Error: {range_error}",
+                        f"Page range validation failed: {range_error}",
+                        {"success": False, "error": range_error},
+                    )
             
-            # Extract metadata if requested
-            metadata = self._extract_metadata(doc) if include_metadata else {}
+                # Extract text from specified pages
+                extracted_text, page_info, last_page, truncated = self._extract_text_from_pages(
+                    doc, start, end, full_file_path
+                )
             
-            doc.close()
+                # Extract metadata if requested
+                metadata = (
+                    asdict(self._get_metadata(doc, full_file_path, file_stat.st_mtime_ns))
+                    if include_metadata else {}
+                )
             
             # Handle empty extraction
             if not extracted_text:
@@ -988,24 +2036,39 @@ class PDFTextReader(AgentPlugin):
                     },
                 )
             
-            # Truncate if necessary
-            original_length = len(extracted_text)
-            if len(extracted_text) > self.max_output_length:
-                extracted_text = (
-                    extracted_text[:self.max_output_length]
-                    + f"\n\n... (content truncated due to length limit of {self.max_output_length} characters)"
+            # The text was already cut to the character limit during extraction. UTF-8 takes
+            # up to 4 bytes per character (3 for CJK), so enforce the byte budget too
+            byte_truncated = False
+            if len(extracted_text) * 4 > self.max_output_bytes:  # otherwise it cannot be over budget
+                encoded = extracted_text.encode("utf-8")
+                if len(encoded) > self.max_output_bytes:
+                    # "ignore" drops a multi-byte character split by the cut
+                    extracted_text = encoded[:self.max_output_bytes].decode("utf-8", "ignore")
+                    byte_truncated = True
+            
+            truncated = truncated or byte_truncated
+            content_chars = len(extracted_text)
+            if byte_truncated:
+                extracted_text += (
+                    f"\n\n... (content truncated due to size limit of {self.max_output_bytes} bytes)"
+                )
+            elif truncated:
+                extracted_text += (
+                    f"\n\n... (content truncated due to length limit of {self.max_output_length} characters)"
                 )
             
             # Prepare success response
             response_data = {
                 "success": True,
-                "extracted_chars": original_length,
+                "extracted_chars": content_chars,
                 "displayed_chars": len(extracted_text),
-                "pages_processed": end - start + 1,
+                "displayed_bytes": len(extracted_text.encode("utf-8")),
+                "pages_processed": last_page - start + 1,
                 "page_range": f"{start}-{end}",
+                "last_page_processed": last_page,
                 "total_pages": total_pages,
                 "page_info": page_info,
-                "truncated": original_length > self.max_output_length
+                "truncated": truncated
             }
             
             if include_metadata:
@@ -1013,7 +2076,7 @@ class PDFTextReader(AgentPlugin):
             
             success_message = (
                 f"Successfully extracted text from {relative_file_path} "
-                f"(pages {start}-{end}, {original_length} characters)"
+                f"(pages {start}-{end}, {content_chars} characters)"
             )
             
             return AgentImplOutput(
@@ -1022,7 +2085,7 @@ class PDFTextReader(AgentPlugin):
                 response_data,
             )
             
-        except pymupdf.FileDataError as e:
+        except self._corrupt_errors as e:
             error_msg = f"PDF file is corrupted or invalid: {str(e)}"
             return AgentImplOutput(
                 f"Error: {error_msg}",
@@ -1040,13 +2103,56 @@ class PDFTextReader(AgentPlugin):
             
         except Exception as e:
             error_msg = f"Unexpected error extracting text from PDF {relative_file_path}: {str(e)}"
-            self.logger.error(error_msg, exc_info=True)
+            self.logger.error("Unexpected error extracting text from PDF %s: %s", relative_file_path, e)
+            # The traceback is only worth formatting when someone is reading debug logs
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Traceback for %s", relative_file_path, exc_info=True)
             return AgentImplOutput(
                 f"Error: {error_msg}",
                 f"Failed to extract text from {relative_file_path}",
                 {"success": False, "error": str(e), "error_type": "unexpected_error"},
             )
         
+# (Qdrant URL, collection name) pairs already known to exist in this process
+_ensured_collections: Set[tuple[str, str]] = set()
+
+
+async def _ensure_collection(
+    qdrant_client: AsyncQdrantClient,
+    qdrant_url: str,
+    collection_name: str,
+    dimension: int
+):
+    """Create the collection if missing; checked once per process, so later users skip the round-trip"""
+    key = (qdrant_url, collection_name)
+    if key in _ensured_collections:
+        return
+    
+    if not await qdrant_client.collection_exists(collection_name):
+        try:
+            await qdrant_client.create_collection(
+                collection_name=collection_name,
+                # Full-precision vectors live on disk; int8 copies in RAM serve the search
+                vectors_config=VectorParams(
+                    size=dimension,
+                    distance=Distance.COSINE,
+                    on_disk=True
+                ),
+                quantization_config=ScalarQuantization(
+                    scalar=ScalarQuantizationConfig(
+                        type=ScalarType.INT8,
+                        always_ram=True
+                    )
+                )
+            )
+        except UnexpectedResponse:
+            # Another setup may have created it in the meantime
+            if not await qdrant_client.collection_exists(collection_name):
+                raise
+    
+    _ensured_collections.add(key)
+
+
 async def setup_rag_tools(
     workspace_manager: WorkspaceManager,
     db_manager: DatabaseManager,
@@ -1056,21 +2162,33 @@ async def setup_rag_tools(
     embedding_api_key: str = None,
     collection_name: str = "documents",
     user_id: str = None,  # REQUIRED
-    session_id: Optional[str] = None  # Optional
+    session_id: Optional[str] = None,  # Optional
+    qdrant_pool_size: int = 64,
+    qdrant_prefer_grpc: bool = False
 ) -> tuple[IndexDocumentsTool, SearchDocumentsTool,PDFTextReader,EmbeddingProvider]:
     """
     Setup RAG tools with USER and SESSION isolation
     Each user gets their own isolated tools instance
+
+    qdrant_pool_size sets how many connections the Qdrant client keeps open, so
+    the concurrent upserts issued while indexing are not queued behind a few sockets.
+    The Qdrant client and the embedding HTTP client are shared by all users; set
+    qdrant_prefer_grpc when the server's gRPC port is reachable.
     """
     
     if not user_id:
         raise ValueError("user_id is REQUIRED for RAG tools")
     
     # Initialize Qdrant client (shared)
-    qdrant_client = AsyncQdrantClient(
-        url=qdrant_url,
-        api_key=qdrant_api_key,
-        timeout=60
+    qdrant_client = _shared_client(
+        ("qdrant", qdrant_url, qdrant_api_key, qdrant_pool_size, qdrant_prefer_grpc),
+        lambda: AsyncQdrantClient(
+            url=qdrant_url,
+            api_key=qdrant_api_key,
+            timeout=60,
+            pool_size=qdrant_pool_size,
+            prefer_grpc=qdrant_prefer_grpc
+        )
     )
     
     embeddings = EmbeddingProvider(
@@ -1080,33 +2198,7 @@ async def setup_rag_tools(
     await embeddings.initialize()
     
     # Ensure collection exists (shared)
-    try:
-        await qdrant_client.get_collection(collection_name)
-    except:
-        await qdrant_client.create_collection(
-            collection_name=collection_name,
-            vectors_config=VectorParams(
-                size=embeddings.dimension,
-                distance=Distance.COSINE
-            )
-        )
-        
-        # Create indexes for user_id and session_id
-        await qdrant_client.create_payload_index(
-            collection_name=collection_name,
-            field_name="user_id",
-            field_schema=PayloadSchemaType.KEYWORD
-        )
-        await qdrant_client.create_payload_index(
-            collection_name=collection_name,
-            field_name="session_id",
-            field_schema=PayloadSchemaType.KEYWORD
-        )
-        await qdrant_client.create_payload_index(
-            collection_name=collection_name,
-            field_name="file_hash",
-            field_schema=PayloadSchemaType.KEYWORD
-        )
+    await _ensure_collection(qdrant_client, qdrant_url, collection_name, embeddings.dimension)
     
     # Create USER-SPECIFIC index manager
     index_manager = DocumentIndexManager(
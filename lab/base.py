@@ -31,6 +31,11 @@ class AgentPlugin(ABC):
             raise ValueError(f"{self.__class__.__name__} must define 'description' class attribute")
         if not hasattr(self, 'input_schema') or not self.input_schema:
             raise ValueError(f"{self.__class__.__name__} must define 'input_schema' class attribute")
+        try:
+            self._input_validator = self._build_input_validator()
+        except jsonschema.SchemaError:
+            # Reported on the first call instead, as jsonschema.validate would
+            self._input_validator = None
 
     ## Control flow property
     @property
@@ -67,5 +72,18 @@ class AgentPlugin(ABC):
             input_schema=self.input_schema
         )
 
+    def _build_input_validator(self) -> jsonschema.protocols.Validator:
+        """Check input_schema once and build a reusable validator for it"""
+        validator_cls = jsonschema.validators.validator_for(self.input_schema)
+        validator_cls.check_schema(self.input_schema)
+        return validator_cls(self.input_schema)
+
     def _validate_tool_input(self, tool_input: dict[str, Any]) -> None:
-        jsonschema.validate(instance=tool_input, schema=self.input_schema)
\ No newline at end of file
+        # Same result as jsonschema.validate, without re-checking the schema on every call.
+        # Built lazily too, for subclasses that skip super().__init__() or swap the schema
+        validator = getattr(self, "_input_validator", None)
+        if validator is None or validator.schema is not self.input_schema:
+            validator = self._input_validator = self._build_input_validator()
+        error = jsonschema.exceptions.best_match(validator.iter_errors(tool_input))
+        if error is not None:
+            raise error
\ No newline at end of file
@@ -5,16 +5,150 @@ in a containerized environment while maintaining the same interface as the origi
 """
 
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Protocol, Tuple
+from functools import lru_cache
+from itertools import chain
+import asyncio
 import logging
+import re
+import shlex
+import time
 from abc import ABC, abstractmethod
-from utilss.workspace_manager import WorkspaceManager
 from llm.message_history import MessageHistory
 from lab.base import AgentPlugin, AgentImplOutput
 
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Default banned commands (extended per tool by additional_banned_command_strs)
+DEFAULT_BANNED_COMMAND_STRS = (
+    "rm -rf /",
+    "dd if=",
+    "mkfs",
+    "fdisk",
+    "format",
+    "shutdown",
+    "reboot",
+    "halt",
+    "> /dev/null",
+    ":(){ :|:& };:",  # Fork bomb
+)
+
+# Seconds GNU timeout waits after SIGTERM before sending SIGKILL
+TIMEOUT_KILL_GRACE = 5
+
+# Exit statuses of GNU timeout when the command ran out of time, after SIGTERM and
+# after the SIGKILL that follows the grace period
+TIMEOUT_EXIT_CODES = (124, 128 + 9)
+
+# Commands that already change directory themselves
+_CD_RE = re.compile(r"^\s*cd\b")
+
+# Loops and waits that SandboxFilter puts under a timeout; whole words only, so "format" or "forever" do not count
+_SANDBOX_RE = re.compile(r"\b(?:while|for|sleep|wait)\b", re.IGNORECASE)
+
+# Paths commands should not reach outside the workspace
+DANGEROUS_PATTERNS = (
+    '../', '..\\', '/etc/passwd', '/etc/shadow',
+    'c:\\', 'd:\\', '\\windows\\', '\\system32\\',
+    '/proc/version', '/sys/', '/dev/mem'
+)
+
+# Privilege escalation attempts
+PRIVILEGE_PATTERNS = (
+    'sudo su', 'su -', 'chmod 777', 'chown root', 
+    'passwd root', 'adduser', 'useradd'
+)
+
+
+class _SafetyMatcher:
+    """Finds any of a set of patterns in a command, case-insensitively, with a single scan.
+
+    Uses a pyahocorasick automaton when installed, otherwise one compiled
+    alternation regex (over bytes for ASCII commands).
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, str]]):
+        """Build the matcher.
+
+        Args:
+            patterns: (reason prefix, pattern) pairs; the first reason wins for duplicates
+        """
+        self._reasons: Dict[str, str] = {}
+        for prefix, pattern in patterns:
+            self._reasons.setdefault(pattern.lower(), f"{prefix}: {pattern}")
+
+        # No pattern fits in a command shorter than this
+        self._min_len = min(map(len, self._reasons), default=0)
+
+        self._automaton = None
+        self._regex = None
+        self._regex_ascii = None
+        if HAS_AHOCORASICK:
+            self._automaton = ahocorasick.Automaton()
+            for needle, reason in self._reasons.items():
+                self._automaton.add_word(needle, reason)
+            self._automaton.make_automaton()
+        else:
+            # Longest first, so a needle is not shadowed by one of its own prefixes
+            needles = sorted(self._reasons, key=len, reverse=True)
+            self._regex = re.compile("|".join(map(re.escape, needles)))
+            # Only ASCII needles can occur in an ASCII command
+            ascii_needles = [n.encode("ascii") for n in needles if n.isascii()]
+            if ascii_needles:
+                self._regex_ascii = re.compile(b"|".join(map(re.escape, ascii_needles)))
+
+    def search(self, command: str) -> Optional[str]:
+        """Return the reason for the first pattern found in the command, or None."""
+        # (lower() can lengthen non-ASCII text, e.g. "İ" becomes two code points)
+        if len(command) < self._min_len and command.isascii():
+            return None
+        # Patterns were lowercased once at build time, so only the command needs it
+        if self._automaton is not None:
+            for _end, reason in self._automaton.iter(command.lower()):
+                return reason
+            return None
+        if command.isascii():
+            if self._regex_ascii is None:
+                return None
+            # bytes.lower() skips Unicode case mapping, and the bytes regex loop is tighter.
+            # A lowered pattern rather than re.IGNORECASE, which is several times slower
+            match = self._regex_ascii.search(command.encode("ascii").lower())
+            return self._reasons[match.group(0).decode("ascii")] if match else None
+        match = self._regex.search(command.lower())
+        return self._reasons[match.group(0)] if match else None
+
+
+@lru_cache(maxsize=64)
+def _build_safety_matcher(banned: Tuple[str, ...]) -> _SafetyMatcher:
+    """Matcher for the banned strings plus the path and privilege patterns, shared by tools with the same list"""
+    return _SafetyMatcher(chain(
+        (("Banned command pattern detected", s) for s in banned),
+        (("Potentially dangerous path detected", p) for p in DANGEROUS_PATTERNS),
+        (("Privilege escalation attempt detected", p) for p in PRIVILEGE_PATTERNS),
+    ))
+
+
+class BashWorkspace(Protocol):
+    """What DockerBashTool needs from its workspace manager (a DockerWorkspaceManager).
+
+    An async ``aexecute_bash_command`` with the same signature is used instead of
+    ``execute_bash_command`` when the manager provides one.
+    """
+
+    workspace_id: str
+    active_container: Any  # docker.models.containers.Container, or None when stopped
+
+    def execute_bash_command(self, command: str) -> Tuple[int, str, str]:
+        ...
+
+
 class CommandFilter(ABC):
     """Abstract base class for command filters.
 
@@ -67,7 +201,7 @@ Run commands in a bash shell within a Docker container
 
     def __init__(
         self,
-        workspace_manager:WorkspaceManager,  # DockerWorkspaceManager instance
+        workspace_manager: BashWorkspace,  # DockerWorkspaceManager instance
         require_confirmation: bool = True,
         command_filters: Optional[List[CommandFilter]] = None,
         timeout: int = 180,
@@ -86,30 +220,26 @@ Run commands in a bash shell within a Docker container
         self.workspace_manager = workspace_manager
         self.require_confirmation = require_confirmation
         self.command_filters = command_filters or []
+        self._compile_filter_chain()
         self.timeout = timeout
 
         # Default banned commands (can be extended)
-        self.banned_command_strs = [
-            "rm -rf /",
-            "dd if=",
-            "mkfs",
-            "fdisk",
-            "format",
-            "shutdown",
-            "reboot",
-            "halt",
-            "> /dev/null",
-            ":(){ :|:& };:",  # Fork bomb
-        ]
+        self.banned_command_strs = list(DEFAULT_BANNED_COMMAND_STRS)
         
         if additional_banned_command_strs is not None:
             self.banned_command_strs.extend(additional_banned_command_strs)
 
+        # All three pattern lists, matched in one pass by _is_command_safe. Rebuilt there
+        # whenever banned_command_strs is changed after construction
+        self._safety_banned = tuple(self.banned_command_strs)
+        self._safety_matcher = _build_safety_matcher(self._safety_banned)
+
         # Validate workspace manager
-        if not hasattr(workspace_manager, 'execute_bash_command'):
+        if not (hasattr(workspace_manager, 'execute_bash_command')
+                or hasattr(workspace_manager, 'aexecute_bash_command')):
             raise ValueError("workspace_manager must have execute_bash_command method")
 
-        logger.info(f"🔧 DockerBashTool initialized with workspace: {workspace_manager.workspace_id}")
+        logger.info("🔧 DockerBashTool initialized with workspace: %s", workspace_manager.workspace_id)
 
     def add_command_filter(self, command_filter: CommandFilter) -> None:
         """Add a command filter to the filter chain.
@@ -118,6 +248,24 @@ Run commands in a bash shell within a Docker container
             command_filter: The filter to add
         """
         self.command_filters.append(command_filter)
+        self._compile_filter_chain()
+
+    def _compile_filter_chain(self) -> None:
+        """Compose the command filters into a single callable used by apply_filters.
+
+        The built-in filters are inlined with their compiled regexes and prefixes
+        bound up front; other CommandFilter subclasses are called through
+        filter_command as before.
+        """
+        chain_fn: Optional[Callable[[str], str]] = None
+        for command_filter in self.command_filters:
+            step = _inline_filter(command_filter)
+            if chain_fn is None:
+                chain_fn = step
+            else:
+                chain_fn = lambda command, first=chain_fn, then=step: then(first(command))
+        self._filter_chain = chain_fn or (lambda command: command)
+        self._filter_chain_len = len(self.command_filters)
 
     def apply_filters(self, command: str) -> str:
         """Apply all command filters to a command.
@@ -128,10 +276,38 @@ Run commands in a bash shell within a Docker container
         Returns:
             The transformed command after applying all filters
         """
-        filtered_command = command
-        for filter in self.command_filters:
-            filtered_command = filter.filter_command(filtered_command)
-        return filtered_command
+        # Filters appended to command_filters directly, rather than via add_command_filter
+        if len(self.command_filters) != self._filter_chain_len:
+            self._compile_filter_chain()
+        return self._filter_chain(command)
+
+    async def _execute_command(self, command: str) -> Tuple[int, str, str]:
+        """Run a command through the workspace manager without blocking the event loop.
+
+        Uses the manager's aexecute_bash_command coroutine when it has one, otherwise
+        runs the synchronous execute_bash_command in a worker thread.
+
+        The command runs under GNU timeout inside the container. timeout signals its
+        whole process group, so pipeline and subshell children are killed with the
+        shell rather than outliving it. The wait here is bounded as well, in case the
+        exec itself hangs.
+
+        Args:
+            command: The command to execute
+
+        Returns:
+            Tuple of (exit_code, stdout, stderr)
+
+        Raises:
+            asyncio.TimeoutError: If the container did not answer in time
+        """
+        wrapped = f"timeout -k {TIMEOUT_KILL_GRACE} {self.timeout} bash -c {shlex.quote(command)}"
+        aexecute = getattr(self.workspace_manager, "aexecute_bash_command", None)
+        if aexecute is not None:
+            call = aexecute(wrapped)
+        else:
+            call = asyncio.to_thread(self.workspace_manager.execute_bash_command, wrapped)
+        return await asyncio.wait_for(call, timeout=self.timeout + 2 * TIMEOUT_KILL_GRACE)
 
     def _is_command_safe(self, command: str) -> Tuple[bool, str]:
         """Check if command is safe to execute.
@@ -142,33 +318,15 @@ Run commands in a bash shell within a Docker container
         Returns:
             Tuple of (is_safe, reason_if_not_safe)
         """
-        command_lower = command.lower().strip()
-        
-        # Check for banned command strings
-        for banned_str in self.banned_command_strs:
-            if banned_str.lower() in command_lower:
-                return False, f"Banned command pattern detected: {banned_str}"
-        
-        # Check for dangerous patterns
-        dangerous_patterns = [
-            '../', '..\\', '/etc/passwd', '/etc/shadow',
-            'c:\\', 'd:\\', '\\windows\\', '\\system32\\',
-            '/proc/version', '/sys/', '/dev/mem'
-        ]
-        
-        for pattern in dangerous_patterns:
-            if pattern.lower() in command_lower:
-                return False, f"Potentially dangerous path detected: {pattern}"
-        
-        # Check for privilege escalation attempts
-        privilege_patterns = [
-            'sudo su', 'su -', 'chmod 777', 'chown root', 
-            'passwd root', 'adduser', 'useradd'
-        ]
-        
-        for pattern in privilege_patterns:
-            if pattern.lower() in command_lower:
-                return False, f"Privilege escalation attempt detected: {pattern}"
+        banned = tuple(self.banned_command_strs)
+        if banned != self._safety_banned:
+            self._safety_banned = banned
+            self._safety_matcher = _build_safety_matcher(banned)
+
+        # Banned commands, dangerous paths and privilege escalation, in one scan
+        reason = self._safety_matcher.search(command)
+        if reason is not None:
+            return False, reason
         
         return True, ""
 
@@ -191,6 +349,7 @@ Run commands in a bash shell within a Docker container
         # Apply all command filters
         command = self.apply_filters(original_command)
         
+        # Built fresh per call, so each return path fills it in place rather than copying it
         aux_data = {
             "original_command": original_command,
             "executed_command": command,
@@ -198,46 +357,65 @@ Run commands in a bash shell within a Docker container
             # "language_profile": self.workspace_manager.language_profile,
         }
 
-        # Show the original command in the confirmation prompt
-        display_command = original_command
-        # If the command was transformed, also show the transformed version
-        if command != original_command:
-            display_command = f"{original_command}\nTransformed to: {command}"
-
         # Safety check
         is_safe, safety_reason = self._is_command_safe(command)
         if not is_safe:
+            aux_data.update({"success": False, "reason": "Security violation", "safety_reason": safety_reason})
             return AgentImplOutput(
                 f"❌ Command blocked for security reasons: {safety_reason}",
                 f"Command not executed due to security restrictions: {safety_reason}",
-                aux_data | {"success": False, "reason": "Security violation", "safety_reason": safety_reason}
+                aux_data
             )
 
         # User confirmation if required
         if self.require_confirmation:
-            confirmation = input(
+            # Show the original command in the confirmation prompt
+            display_command = original_command
+            # If the command was transformed, also show the transformed version
+            if command != original_command:
+                display_command = f"{original_command}\nTransformed to: {command}"
+
+            # input() blocks, so wait for the answer in a worker thread
+            confirmation = await asyncio.to_thread(
+                input,
                 f"🔧 Do you want to execute the command in Docker container: {display_command}? (y/n): "
             )
             if confirmation.lower() not in ['y', 'yes']:
+                aux_data.update({"success": False, "reason": "User cancelled"})
                 return AgentImplOutput(
                     "❌ Command not executed due to lack of user confirmation.",
                     "Command execution cancelled by user",
-                    aux_data | {"success": False, "reason": "User cancelled"}
+                    aux_data
                 )
 
-        # Check if workspace manager is available
-        if not self.workspace_manager or not self.workspace_manager.active_container:
+        # Check if workspace manager is available; the container is looked up once per call
+        container = self.workspace_manager.active_container if self.workspace_manager else None
+        if not container:
+            aux_data.update({"success": False, "reason": "No active container"})
             return AgentImplOutput(
                 "❌ Docker workspace not available. Container may be stopped or not initialized.",
                 "Docker workspace unavailable",
-                aux_data | {"success": False, "reason": "No active container"}
+                aux_data
             )
 
         try:
-            logger.info(f"🔧 Executing command in Docker: {command}")
+            logger.info("🔧 Executing command in Docker: %s", command)
             
             # Execute the command using the workspace manager
-            exit_code, stdout, stderr = self.workspace_manager.execute_bash_command(command)
+            started = time.monotonic()
+            exit_code, stdout, stderr = await self._execute_command(command)
+            elapsed = time.monotonic() - started
+            
+            # A command can exit with these codes on its own (a nested timeout, a child
+            # killed with SIGKILL), so only a run that lasted the full budget counts
+            if exit_code in TIMEOUT_EXIT_CODES and elapsed >= self.timeout:
+                aux_data.update({"success": False, "error": "timeout", "timeout": self.timeout,
+                                 "exit_code": exit_code, "stdout": stdout, "stderr": stderr})
+                return AgentImplOutput(
+                    f"⏰ Command timed out after {self.timeout} seconds. Please try a simpler command or increase timeout.",
+                    "Command execution timed out",
+                    aux_data
+                )
             
             # Format the output
             output_parts = []
@@ -261,16 +439,26 @@ Run commands in a bash shell within a Docker container
             # Determine success based on exit code
             success = exit_code == 0
             
+            aux_data.update({
+                "success": success,
+                "exit_code": exit_code,
+                "stdout": stdout,
+                "stderr": stderr,
+                "container_id": container.short_id
+            })
             return AgentImplOutput(
                 full_output,
                 f"Command '{command}' executed in Docker container",
-                aux_data | {
-                    "success": success,
-                    "exit_code": exit_code,
-                    "stdout": stdout,
-                    "stderr": stderr,
-                    "container_id": self.workspace_manager.active_container.short_id if self.workspace_manager.active_container else None
-                }
+                aux_data
+            )
+
+        except asyncio.TimeoutError:
+            logger.error("⏰ Docker exec did not return within %s seconds: %s", self.timeout, command)
+            aux_data.update({"success": False, "error": "timeout", "timeout": self.timeout})
+            return AgentImplOutput(
+                f"⏰ Command timed out after {self.timeout} seconds. Please try a simpler command or increase timeout.",
+                "Command execution timed out",
+                aux_data
             )
 
         except Exception as e:
@@ -279,30 +467,32 @@ Run commands in a bash shell within a Docker container
             
             # Check if it's a timeout error
             if "timeout" in error_msg.lower():
+                aux_data.update({"success": False, "error": "timeout", "timeout": self.timeout})
                 return AgentImplOutput(
                     f"⏰ Command timed out after {self.timeout} seconds. Please try a simpler command or increase timeout.",
                     "Command execution timed out",
-                    aux_data | {"success": False, "error": "timeout", "timeout": self.timeout}
+                    aux_data
                 )
             
             # Check if container is still running
             try:
-                if self.workspace_manager.active_container:
-                    self.workspace_manager.active_container.reload()
-                    container_status = self.workspace_manager.active_container.status
-                    if container_status != 'running':
-                        return AgentImplOutput(
-                            f"❌ Docker container is not running (status: {container_status}). Please restart the workspace.",
-                            "Docker container not running",
-                            aux_data | {"success": False, "error": "container_not_running", "container_status": container_status}
-                        )
+                container.reload()
+                container_status = container.status
+                if container_status != 'running':
+                    aux_data.update({"success": False, "error": "container_not_running", "container_status": container_status})
+                    return AgentImplOutput(
+                        f"❌ Docker container is not running (status: {container_status}). Please restart the workspace.",
+                        "Docker container not running",
+                        aux_data
+                    )
             except Exception as container_check_error:
                 logger.error(f"Failed to check container status: {container_check_error}")
             
+            aux_data.update({"success": False, "error": error_msg})
             return AgentImplOutput(
                 f"❌ Error executing command in Docker container: {error_msg}",
                 f"Failed to execute command '{original_command}' in Docker",
-                aux_data | {"success": False, "error": error_msg}
+                aux_data
             )
 
     def get_tool_start_message(self, tool_input: Dict[str, Any]) -> str:
@@ -351,7 +541,7 @@ class WorkspacePathFilter(CommandFilter):
     def filter_command(self, command: str) -> str:
         """Ensure command operates in workspace directory."""
         # If command doesn't start with cd, prepend workspace change
-        if not command.strip().startswith("cd"):
+        if not _CD_RE.match(command):
             return f"cd {self.workspace_path} && {command}"
         return command
 
@@ -364,7 +554,7 @@ class LoggingFilter(CommandFilter):
     
     def filter_command(self, command: str) -> str:
         """Log the command and return it unchanged."""
-        self.logger.info(f"Executing command: {command}")
+        self.logger.info("Executing command: %s", command)
         return command
 
 
@@ -374,11 +564,35 @@ class SandboxFilter(CommandFilter):
     def filter_command(self, command: str) -> str:
         """Add timeout and resource limits to commands."""
         # Add timeout to long-running commands
-        if any(keyword in command.lower() for keyword in ['while', 'for', 'sleep', 'wait']):
+        if _SANDBOX_RE.search(command):
             return f"timeout 300 {command}"
         return command
 
 
+def _inline_filter(command_filter: CommandFilter) -> Callable[[str], str]:
+    """Return a plain function equivalent to command_filter.filter_command.
+
+    Exact built-in filter types get a closure over their precomputed state;
+    subclasses may override filter_command, so they keep the bound method.
+    """
+    filter_type = type(command_filter)
+    if filter_type is WorkspacePathFilter:
+        prefix = f"cd {command_filter.workspace_path} && "
+        is_cd = _CD_RE.match
+        return lambda command: command if is_cd(command) else prefix + command
+    if filter_type is LoggingFilter:
+        log_info = command_filter.logger.info
+
+        def log_command(command: str) -> str:
+            log_info("Executing command: %s", command)
+            return command
+        return log_command
+    if filter_type is SandboxFilter:
+        needs_timeout = _SANDBOX_RE.search
+        return lambda command: f"timeout 300 {command}" if needs_timeout(command) else command
+    return command_filter.filter_command
+
+
 def create_docker_bash_tool(
     workspace_manager,
     ask_user_permission: bool = True,
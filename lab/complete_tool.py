@@ -22,13 +22,16 @@ class CompleteTool(AgentPlugin):
     def __init__(self):
         super().__init__()
         self.answer: str = ""
+        self._done = False
 
     @property
     def should_stop(self):
-        return self.answer != ""
+        # Polled every agent step, so a flag rather than comparing a possibly long answer
+        return self._done
 
     def reset(self):
         self.answer = ""
+        self._done = False
 
     async def run_impl(
         self,
@@ -37,6 +40,7 @@ class CompleteTool(AgentPlugin):
     ) -> AgentImplOutput:
         assert tool_input["answer"], "Model returned empty answer"
         self.answer = tool_input["answer"]
+        self._done = True
         return AgentImplOutput(tool_output=self.answer, tool_result_message=self.answer
     )
 
@@ -50,17 +54,20 @@ class ReturnControlToUserTool(AgentPlugin):
         "type": "object",
         "properties": {},
         "required": [],
-    },
+    }
         
     def __init__(self):
+        super().__init__()
         self.answer: str = ""
+        self._done = False
 
     @property
     def should_stop(self):
-        return self.answer != ""
+        return self._done
 
     def reset(self):
         self.answer = ""
+        self._done = False
 
     async def run_impl(
         self,
@@ -68,8 +75,9 @@ class ReturnControlToUserTool(AgentPlugin):
         message_history: Optional[MessageHistory] = None,
     ) -> AgentImplOutput:
         self.answer = "Task completed"
+        self._done = True
         return AgentImplOutput(
-            tool_result="Task completed",
+            tool_output="Task completed",
             tool_result_message="Task completed",
         )
 
@@ -1,10 +1,52 @@
+import atexit
 import base64
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
 from PIL import Image
 from io import BytesIO
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 MAX_LENGTH_TRUNCATE_CONTENT = 20000
 
+# (connect, read) timeout for image downloads
+HTTP_TIMEOUT = (5, 30)
+
+
+def _build_http_session() -> requests.Session:
+    """Session with pooled keep-alive connections and retries on transient failures"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504)),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
+# Shared by every image download, so repeat requests to the same CDN skip the TCP/TLS handshake
+HTTP_SESSION = _build_http_session()
+
+# Base64 of downloaded images, keyed by URL, so repeat encode_image(url) calls skip the download.
+# Entries are reused for ENCODED_IMAGE_CACHE_TTL seconds, then revalidated with the server
+ENCODED_IMAGE_CACHE_SIZE = 256
+ENCODED_IMAGE_CACHE_TTL = 300
+
+# A multiple of 3 bytes, so chunks line up with base64's 3-byte groups
+DOWNLOAD_CHUNK_SIZE = 57 * 1024
+
 def save_base64_image_png(base64_str:str, path:str)->None:
     if "," in base64_str:
         base64_str = base64_str.split(",")[1]
@@ -13,22 +55,110 @@ def save_base64_image_png(base64_str:str, path:str)->None:
     image.save(path, format="PNG")
 
 
+# URL -> {"path", "fetched_at", "etag", "last_modified"}, least recently used first
+_encoded_images: "OrderedDict[str, dict]" = OrderedDict()
+_encoded_images_lock = threading.Lock()
+_encoded_images_dir: Optional[Path] = None
+
+
+def _encoded_image_dir() -> Path:
+    """Private (0700) per-process cache directory, removed at exit"""
+    global _encoded_images_dir
+    if _encoded_images_dir is None:
+        _encoded_images_dir = Path(tempfile.mkdtemp(prefix="open_orion_images_"))
+        atexit.register(shutil.rmtree, _encoded_images_dir, True)
+    return _encoded_images_dir
+
+
+def _cached_encoding(entry: dict):
+    try:
+        return entry["path"].read_text(encoding="ascii")
+    except OSError:
+        return None
+
+
+def _forget_encoding(url: str) -> None:
+    with _encoded_images_lock:
+        entry = _encoded_images.pop(url, None)
+    if entry is not None:
+        entry["path"].unlink(missing_ok=True)
+
+
+def _store_encoding(url: str, encoded: str, response: requests.Response) -> None:
+    try:
+        with _encoded_images_lock:
+            cache_dir = _encoded_image_dir()
+            cache_path = cache_dir / (hashlib.sha256(url.encode("utf-8")).hexdigest() + ".b64")
+            tmp_path = cache_path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_text(encoded, encoding="ascii")
+            os.replace(tmp_path, cache_path)
+
+            _encoded_images[url] = {
+                "path": cache_path,
+                "fetched_at": time.monotonic(),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            _encoded_images.move_to_end(url)
+            while len(_encoded_images) > ENCODED_IMAGE_CACHE_SIZE:
+                _, stale = _encoded_images.popitem(last=False)
+                stale["path"].unlink(missing_ok=True)
+    except OSError:
+        # The cache is only an optimisation
+        pass
+
+
 def encode_image(image_path):
     if image_path.startswith("http"):
+        with _encoded_images_lock:
+            entry = _encoded_images.get(image_path)
+            if entry is not None:
+                _encoded_images.move_to_end(image_path)
+                entry = dict(entry)
+
         user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36 Edg/119.0.0.0"
-        request_kwargs = {
-            "headers": {"User-Agent": user_agent},
-            "stream": True,
-        }
+        headers = {"User-Agent": user_agent}
+        if entry is not None:
+            if time.monotonic() - entry["fetched_at"] < ENCODED_IMAGE_CACHE_TTL:
+                encoded = _cached_encoding(entry)
+                if encoded is not None:
+                    return encoded
+                _forget_encoding(image_path)
+                entry = None
+            else:
+                # Stale: ask the server whether the image changed
+                if entry["etag"]:
+                    headers["If-None-Match"] = entry["etag"]
+                if entry["last_modified"]:
+                    headers["If-Modified-Since"] = entry["last_modified"]
 
-        response = requests.get(image_path, **request_kwargs)
-        response.raise_for_status()
-        image_data = response.content
-        return base64.b64encode(image_data).decode("utf-8")
+        with HTTP_SESSION.get(image_path, headers=headers, stream=True, timeout=HTTP_TIMEOUT) as response:
+            if response.status_code == 304 and entry is not None:
+                encoded = _cached_encoding(entry)
+                if encoded is not None:
+                    with _encoded_images_lock:
+                        if image_path in _encoded_images:
+                            _encoded_images[image_path]["fetched_at"] = time.monotonic()
+                    return encoded
+                # The cached copy is gone; fetch the image unconditionally
+                _forget_encoding(image_path)
+                return encode_image(image_path)
+
+            response.raise_for_status()
+            image_data = bytearray()
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                image_data += chunk
+            encoded = base64.b64encode(image_data).decode("ascii")
+            _store_encoding(image_path, encoded, response)
+        return encoded
 
     with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode("utf-8")
+        return base64.b64encode(image_file.read()).decode("ascii")
+
 
+@lru_cache(maxsize=16)
+def _truncation_notice(max_length: int) -> str:
+    return f"\n..._This content has been truncated to stay below {max_length} characters_...\n"
 
 
 def truncate_content(
@@ -36,9 +166,7 @@ def truncate_content(
 ) -> str:
     if len(content) <= max_length:
         return content
-    else:
-        return (
-            content[: max_length // 2]
-            + f"\n..._This content has been truncated to stay below {max_length} characters_...\n"
-            + content[-max_length // 2 :]
-        )
\ No newline at end of file
+    # One join copies each kept half once, instead of building an intermediate string per +
+    return "".join(
+        (content[: max_length // 2], _truncation_notice(max_length), content[-max_length // 2 :])
+    )
\ No newline at end of file
@@ -1,7 +1,9 @@
 import asyncio
 import json
 import logging
-from typing import Dict, List, Any, Optional, Union
+import os
+import weakref
+from typing import Dict, List, Any, Optional, Tuple, Union
 from dataclasses import dataclass
 import aiohttp
 import subprocess
@@ -58,6 +60,10 @@ class StdioMCPClient(MCPClient):
         self.process: Optional[subprocess.Popen] = None
         self.request_id = 0
         self.logger = logging.getLogger(f"mcp_client_{config.name}")
+        # Requests awaiting a response, by JSON-RPC id; a single reader task resolves them,
+        # so any number of requests can be in flight over the one stdio pipe
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader_task: Optional[asyncio.Task] = None
     
     async def connect(self) -> bool:
         try:
@@ -72,8 +78,11 @@ class StdioMCPClient(MCPClient):
                 stdin=asyncio.subprocess.PIPE,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
-                env=env
+                env=env,
+                # One response per line; tool results can be far larger than the 64 KiB default
+                limit=16 * 1024 * 1024,
             )
+            self._reader_task = asyncio.create_task(self._read_responses())
             
             # Initialize MCP connection
             await self._send_request("initialize", {
@@ -90,15 +99,81 @@ class StdioMCPClient(MCPClient):
             return True
         except Exception as e:
             self.logger.error(f"Failed to connect to MCP server {self.config.name}: {e}")
+            # The caller drops the client, so stop the reader and the process here
+            await self.disconnect()
             return False
     
     async def disconnect(self):
+        if self._reader_task:
+            self._reader_task.cancel()
+            self._reader_task = None
+        self._fail_pending(ConnectionError(f"MCP server {self.config.name} disconnected"))
         if self.process:
-            self.process.terminate()
+            try:
+                self.process.terminate()
+            except ProcessLookupError:
+                pass  # already exited
             await self.process.wait()
             self.process = None
     
-    async def _send_request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _read_responses(self):
+        """Dispatch every response line to the future of the request it answers"""
+        try:
+            while True:
+                line = await self.process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    self.logger.debug(f"Ignoring non JSON-RPC output: {line[:200]!r}")
+                    continue
+                # A JSON-RPC batch is answered with an array of responses
+                for response in message if isinstance(message, list) else [message]:
+                    if not isinstance(response, dict):
+                        self.logger.debug(f"Ignoring non JSON-RPC message: {str(response)[:200]}")
+                        continue
+                    if "method" in response:
+                        # A request or notification from the server, with ids of its own
+                        self._answer_server_request(response)
+                        continue
+                    future = self._pending.pop(response.get("id"), None)
+                    if future is not None and not future.done():
+                        future.set_result(response)
+        except Exception as e:
+            # e.g. a line over the stream limit: responses can no longer be matched to requests
+            self.logger.error(f"Stopped reading from MCP server {self.config.name}: {e}")
+            self._fail_pending(ConnectionError(f"MCP server {self.config.name} output unreadable: {e}"))
+            return
+        self._fail_pending(ConnectionError(f"MCP server {self.config.name} closed its output"))
+    
+    def _answer_server_request(self, message: Dict[str, Any]):
+        """Reply to a server-initiated request: ping succeeds, anything else is unsupported"""
+        if "id" not in message:
+            return  # notifications need no reply
+        if message["method"] == "ping":
+            reply = {"jsonrpc": "2.0", "id": message["id"], "result": {}}
+        else:
+            reply = {
+                "jsonrpc": "2.0",
+                "id": message["id"],
+                "error": {"code": -32601, "message": f"Method not found: {message['method']}"}
+            }
+        try:
+            self.process.stdin.write((json.dumps(reply) + '\n').encode())
+        except Exception as e:
+            self.logger.debug(f"Could not answer {message['method']} from {self.config.name}: {e}")
+    
+    def _fail_pending(self, error: BaseException):
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+    
+    def _new_request(self, method: str, params: Dict[str, Any]) -> Tuple[Dict[str, Any], asyncio.Future]:
+        # Without a live reader nothing would ever resolve the response future
+        if self._reader_task is None or self._reader_task.done():
+            raise ConnectionError(f"MCP server {self.config.name} is not connected")
         self.request_id += 1
         request = {
             "jsonrpc": "2.0",
@@ -106,20 +181,53 @@ class StdioMCPClient(MCPClient):
             "method": method,
             "params": params
         }
-        
-        request_json = json.dumps(request) + '\n'
-        self.process.stdin.write(request_json.encode())
-        await self.process.stdin.drain()
-        
-        # Read response
-        response_line = await self.process.stdout.readline()
-        response = json.loads(response_line.decode().strip())
-        
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self.request_id] = future
+        return request, future
+    
+    @staticmethod
+    def _unwrap(response: Dict[str, Any]) -> Dict[str, Any]:
         if "error" in response:
             raise Exception(f"MCP error: {response['error']}")
-        
         return response.get("result", {})
     
+    async def _write(self, requests: List[Dict[str, Any]]):
+        data = "".join(json.dumps(request) + '\n' for request in requests)
+        try:
+            self.process.stdin.write(data.encode())
+            await self.process.stdin.drain()
+        except Exception:
+            for request in requests:
+                self._pending.pop(request["id"], None)
+            raise
+    
+    async def _send_request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        request, future = self._new_request(method, params)
+        await self._write([request])
+        return self._unwrap(await future)
+    
+    async def call_tools_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """Call several tools with one pipe write, then await all their responses together
+        
+        Results are in call order; a failed call yields its exception instead of raising.
+        """
+        requests, futures = [], []
+        for tool_name, arguments in calls:
+            request, future = self._new_request("tools/call", {"name": tool_name, "arguments": arguments})
+            requests.append(request)
+            futures.append(future)
+        await self._write(requests)
+        
+        responses = await asyncio.gather(*futures, return_exceptions=True)
+        results = []
+        for response in responses:
+            try:
+                results.append(response if isinstance(response, BaseException)
+                               else self._unwrap(response).get("content", []))
+            except Exception as e:
+                results.append(e)
+        return results
+    
     async def list_tools(self) -> List[MCPToolInfo]:
         try:
             result = await self._send_request("tools/list", {})
@@ -149,33 +257,89 @@ class StdioMCPClient(MCPClient):
             self.logger.error(f"Failed to call tool {tool_name}: {e}")
             raise
 
+class SharedSessionRegistry:
+    """One pooled aiohttp session per event loop, shared by every HTTP MCP client
+    
+    Sessions (and their connectors) are bound to the loop they were created on, so
+    the registry keys them by loop and drops them along with it. Owners such as
+    MCPToolManager hold a reference with acquire()/release(); the session is closed
+    when the last one on the loop lets go.
+    """
+    
+    def __init__(self):
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+        self._users: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, int]" = weakref.WeakKeyDictionary()
+    
+    def get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=100,
+                    limit_per_host=20,
+                    keepalive_timeout=75,
+                    ttl_dns_cache=300,
+                ),
+                # Tool calls can legitimately run for minutes; only bound the connect
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=10),
+                cookie_jar=aiohttp.DummyCookieJar(),
+            )
+            self._sessions[loop] = session
+        return session
+    
+    def acquire(self):
+        """Register a user of the running loop's session"""
+        loop = asyncio.get_running_loop()
+        self._users[loop] = self._users.get(loop, 0) + 1
+    
+    async def release(self):
+        """Drop a user registered with acquire(), closing the session after the last one"""
+        loop = asyncio.get_running_loop()
+        remaining = self._users.get(loop, 0) - 1
+        if remaining > 0:
+            self._users[loop] = remaining
+            return
+        self._users.pop(loop, None)
+        await self.close()
+    
+    async def close(self):
+        """Close the session of the running loop, if any"""
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+session_registry = SharedSessionRegistry()
+
 class HttpMCPClient(MCPClient):
     """MCP client for HTTP-based servers"""
     
-    def __init__(self, config: MCPServerConfig):
+    def __init__(self, config: MCPServerConfig, session: Optional[aiohttp.ClientSession] = None):
         self.config = config
-        self.session: Optional[aiohttp.ClientSession] = None
+        # An explicitly passed session is owned by the caller; otherwise the shared one is used
+        self.session = session
         self.request_id = 0
         self.logger = logging.getLogger(f"mcp_client_{config.name}")
     
+    def _get_session(self) -> aiohttp.ClientSession:
+        return self.session or session_registry.get_session()
+    
     async def connect(self) -> bool:
         try:
-            self.session = aiohttp.ClientSession()
             # Test connection
-            async with self.session.get(f"{self.config.url}/health") as resp:
+            async with self._get_session().get(f"{self.config.url}/health") as resp:
                 return resp.status == 200
         except Exception as e:
             self.logger.error(f"Failed to connect to HTTP MCP server {self.config.name}: {e}")
             return False
     
     async def disconnect(self):
-        if self.session:
-            await self.session.close()
-            self.session = None
+        # Sessions are shared or caller-owned; MCPToolManager.shutdown_servers closes the shared one
+        pass
     
     async def list_tools(self) -> List[MCPToolInfo]:
         try:
-            async with self.session.post(f"{self.config.url}/tools/list", json={}) as resp:
+            async with self._get_session().post(f"{self.config.url}/tools/list", json={}) as resp:
                 result = await resp.json()
                 tools = []
                 
@@ -200,7 +364,7 @@ class HttpMCPClient(MCPClient):
                 "arguments": arguments
             }
             
-            async with self.session.post(f"{self.config.url}/tools/call", json=payload) as resp:
+            async with self._get_session().post(f"{self.config.url}/tools/call", json=payload) as resp:
                 result = await resp.json()
                 return result.get("content", [])
         except Exception as e:
@@ -268,6 +432,8 @@ class MCPToolManager:
         self.servers: Dict[str, MCPClient] = {}
         self.tools: Dict[str, MCPToolAdapter] = {}
         self.server_configs: List[MCPServerConfig] = []
+        # Whether this manager holds a reference on the shared HTTP session
+        self._session_acquired = False
     
     def add_server_config(self, config: MCPServerConfig):
         """Add MCP server configuration"""
@@ -279,11 +445,27 @@ class MCPToolManager:
     
     async def initialize_servers(self):
         """Initialize all configured MCP servers"""
-        for config in self.server_configs:
-            await self._initialize_server(config)
+        if not self._session_acquired and any(c.transport == "http" for c in self.server_configs):
+            session_registry.acquire()
+            self._session_acquired = True
+        # Start every server at once, so startup takes as long as the slowest one
+        results = await asyncio.gather(
+            *(self._initialize_server(config) for config in self.server_configs),
+            return_exceptions=True,
+        )
+        # Register in configuration order, so the tool list does not depend on which server answered first
+        for config, result in zip(self.server_configs, results):
+            if isinstance(result, BaseException):
+                self.logger.error(f"Error initializing MCP server {config.name}: {result}")
+            elif result is not None:
+                client, tools = result
+                self.servers[config.name] = client
+                for tool_info in tools:
+                    adapter = MCPToolAdapter(tool_info, client)
+                    self.tools[adapter.name] = adapter
     
-    async def _initialize_server(self, config: MCPServerConfig):
-        """Initialize a single MCP server"""
+    async def _initialize_server(self, config: MCPServerConfig) -> Optional[Tuple[MCPClient, List[MCPToolInfo]]]:
+        """Connect to a single MCP server and discover its tools"""
         try:
             # Create appropriate client based on transport
             if config.transport == "stdio":
@@ -292,24 +474,20 @@ class MCPToolManager:
                 client = HttpMCPClient(config)
             else:
                 self.logger.error(f"Unsupported transport: {config.transport}")
-                return
+                return None
             
             # Connect to server
             if await client.connect():
-                self.servers[config.name] = client
-                
                 # Discover tools
                 tools = await client.list_tools()
-                for tool_info in tools:
-                    adapter = MCPToolAdapter(tool_info, client)
-                    self.tools[adapter.name] = adapter
-                
                 self.logger.info(f"Initialized MCP server {config.name} with {len(tools)} tools")
+                return client, tools
             else:
                 self.logger.error(f"Failed to connect to MCP server {config.name}")
         
         except Exception as e:
             self.logger.error(f"Error initializing MCP server {config.name}: {e}")
+        return None
     
     async def shutdown_servers(self):
         """Shutdown all MCP servers"""
@@ -317,6 +495,10 @@ class MCPToolManager:
             await client.disconnect()
         self.servers.clear()
         self.tools.clear()
+        # Other managers on this loop may still use the shared session
+        if self._session_acquired:
+            self._session_acquired = False
+            await session_registry.release()
     
     def get_mcp_tools(self) -> List[AgentPlugin]:
         """Get all MCP tools as AgentPlugin instances"""
@@ -326,6 +508,40 @@ class MCPToolManager:
         """Get MCP tool by name"""
         return self.tools.get(name)
     
+    async def call_tools_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """Call several MCP tools (by adapter name) concurrently
+        
+        Calls to the same stdio server are written together and pipelined over its pipe.
+        Results are in call order; a failed call yields its exception instead of raising.
+        """
+        results: List[Any] = [None] * len(calls)
+        by_client: Dict[int, Tuple[MCPClient, List[int]]] = {}
+        for index, (name, _) in enumerate(calls):
+            adapter = self.tools.get(name)
+            if adapter is None:
+                results[index] = ValueError(f"MCP tool {name} not found")
+                continue
+            by_client.setdefault(id(adapter.mcp_client), (adapter.mcp_client, []))[1].append(index)
+        
+        async def run_group(client: MCPClient, indexes: List[int]):
+            group = [(self.tools[calls[i][0]].tool_info.name, calls[i][1]) for i in indexes]
+            try:
+                if isinstance(client, StdioMCPClient):
+                    group_results = await client.call_tools_batch(group)
+                else:
+                    group_results = await asyncio.gather(
+                        *(client.call_tool(tool_name, arguments) for tool_name, arguments in group),
+                        return_exceptions=True,
+                    )
+            except Exception as e:
+                self.logger.error(f"Batched MCP call failed: {e}")
+                group_results = [e] * len(indexes)
+            for i, result in zip(indexes, group_results):
+                results[i] = result
+        
+        await asyncio.gather(*(run_group(client, indexes) for client, indexes in by_client.values()))
+        return results
+    
     def list_available_tools(self) -> List[Dict[str, Any]]:
         """List all available MCP tools with their info"""
         tool_list = []
@@ -0,0 +1,113 @@
+import asyncio
+
+import numpy as np
+import pymupdf
+
+from lab import RagPDF
+from lab.RagPDF import DocumentIndexManager, EmbeddingProvider, IndexDocumentsTool, calculate_file_hash
+
+
+class FakeWorkspace:
+    def __init__(self, root):
+        self.root = root
+
+    def workspace_path(self, path):
+        return self.root / path
+
+
+class FakeQdrant:
+    def __init__(self):
+        self.points = []
+
+    async def upsert(self, collection_name, points):
+        self.points.extend(points)
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+
+    async def update_one(self, query, update, upsert=False):
+        self.docs[(query["file_hash"], query["user_id"])] = update["$set"]
+
+
+class FakeDB:
+    def __init__(self):
+        self.db = {"rag_metadata": FakeCollection()}
+
+
+class FakeEmbeddings(EmbeddingProvider):
+    """Embeds without the API, one constant vector per text"""
+
+    def __init__(self):
+        super().__init__(provider="fake")
+        self._dimension = 8
+
+    async def _request_embeddings(self, texts):
+        self.total_texts_embedded += len(texts)
+        self.embedding_calls += 1
+        return np.ones((len(texts), self.dimension), dtype=np.float32)
+
+
+def _make_pdf(path, pages):
+    doc = pymupdf.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Indexing test page {i + 1} of {path.name}")
+    doc.save(path)
+    doc.close()
+
+
+def _make_tool(tmp_path):
+    qdrant = FakeQdrant()
+    db = FakeDB()
+    index_manager = DocumentIndexManager(db, qdrant, FakeEmbeddings(), user_id="user-1")
+    tool = IndexDocumentsTool(FakeWorkspace(tmp_path), index_manager)
+    return tool, qdrant, db
+
+
+def test_index_documents_end_to_end(tmp_path):
+    uploads = tmp_path / "uploaded_files"
+    uploads.mkdir()
+    _make_pdf(uploads / "first.pdf", pages=3)
+    _make_pdf(uploads / "second.pdf", pages=2)
+    (uploads / "broken.pdf").write_bytes(b"not a pdf")
+
+    tool, qdrant, db = _make_tool(tmp_path)
+    file_paths = ["first.pdf", "second.pdf", "broken.pdf", "missing.pdf"]
+    result = asyncio.run(tool.run_impl({"file_paths": file_paths}, None))
+
+    aux = result.auxiliary_data
+    assert aux["successfully_indexed"] == 2
+    assert aux["failed"] == 2
+    assert sorted(aux["indexed_files"]) == ["first.pdf", "second.pdf"]
+
+    stored = db.db["rag_metadata"].docs
+    assert sorted(doc["file_path"] for doc in stored.values()) == ["first.pdf", "second.pdf"]
+    assert len(qdrant.points) == sum(doc["chunk_count"] for doc in stored.values())
+    assert {point.payload["user_id"] for point in qdrant.points} == {"user-1"}
+
+    # Indexed files are skipped on the next run
+    again = asyncio.run(tool.run_impl({"file_paths": ["first.pdf", "second.pdf"]}, None))
+    assert again.auxiliary_data["newly_indexed"] == 0
+    assert len(qdrant.points) == sum(doc["chunk_count"] for doc in stored.values())
+
+
+def test_index_documents_after_restart(tmp_path, monkeypatch):
+    uploads = tmp_path / "uploaded_files"
+    uploads.mkdir()
+    _make_pdf(uploads / "known.pdf", pages=2)
+
+    # A new process: the hash is not cached, but the user's index already lists the file
+    monkeypatch.setattr(RagPDF, "_hash_cache", type(RagPDF._hash_cache)())
+    tool, qdrant, db = _make_tool(tmp_path)
+    file_hash = calculate_file_hash(uploads / "known.pdf")
+    asyncio.run(tool.index_manager.mark_as_indexed(file_hash))
+
+    result = asyncio.run(tool.run_impl({"file_paths": ["known.pdf"]}, None))
+    assert result.auxiliary_data["newly_indexed"] == 0
+    assert qdrant.points == []
+
+    forced = asyncio.run(tool.run_impl({"file_paths": ["known.pdf"], "force_reindex": True}, None))
+    assert forced.auxiliary_data["successfully_indexed"] == 1
+    assert {point.payload["file_hash"] for point in qdrant.points} == {file_hash}